@@ -1,29 +1,120 @@
-from .dolt import (
-    Branch,
-    Commit,
-    Dolt,
-    DoltException,
-    DoltHubContext,
-    KeyPair,
-    Remote,
-    Status,
-    Table,
-    _execute,
-)
-from .types import BranchT, CommitT, DoltT, KeyPairT, RemoteT, StatusT, TableT
-from .utils import (
-    CREATE,
-    FORCE_CREATE,
-    REPLACE,
-    UPDATE,
-    columns_to_rows,
-    detach_head,
-    read_columns,
-    read_columns_sql,
-    read_rows,
-    read_rows_sql,
-    set_dolt_path,
-    write_columns,
-    write_file,
-    write_rows,
-)
+import importlib
+import sys
+from typing import TYPE_CHECKING
+
+# Public names and the submodule each is defined in. They are imported on first access (PEP 562), so scripts
+# that only use the utils do not pay for importing the Dolt class and its dependencies.
+_LAZY = {
+    "Branch": ".dolt",
+    "BranchBatch": ".dolt",
+    "BranchTable": ".dolt",
+    "Commit": ".dolt",
+    "CommitTable": ".dolt",
+    "Dolt": ".dolt",
+    "DoltException": ".dolt",
+    "DoltHubContext": ".dolt",
+    "KeyPair": ".dolt",
+    "Remote": ".dolt",
+    "Status": ".dolt",
+    "Table": ".dolt",
+    "_execute": ".dolt",
+    "clone_many": ".dolt",
+    "fetch_many": ".dolt",
+    "BranchT": ".types",
+    "CommitT": ".types",
+    "DoltT": ".types",
+    "KeyPairT": ".types",
+    "RawJSON": ".types",
+    "RemoteT": ".types",
+    "StatusT": ".types",
+    "TableT": ".types",
+    "CREATE": ".utils",
+    "FORCE_CREATE": ".utils",
+    "REPLACE": ".utils",
+    "UPDATE": ".utils",
+    "bulk_write": ".utils",
+    "columns_to_rows": ".utils",
+    "detach_head": ".utils",
+    "read_columns": ".utils",
+    "read_columns_sql": ".utils",
+    "read_rows": ".utils",
+    "read_rows_sql": ".utils",
+    "read_tuples_sql": ".utils",
+    "set_dolt_path": ".utils",
+    "write_columns": ".utils",
+    "write_file": ".utils",
+    "write_rows": ".utils",
+    "write_rows_stream": ".utils",
+}
+
+# the same names imported for type checkers and IDEs, which do not follow __getattr__, keep the two in step
+if TYPE_CHECKING:
+    from .dolt import (
+        Branch,
+        BranchBatch,
+        BranchTable,
+        Commit,
+        CommitTable,
+        Dolt,
+        DoltException,
+        DoltHubContext,
+        KeyPair,
+        Remote,
+        Status,
+        Table,
+        _execute,
+        clone_many,
+        fetch_many,
+    )
+    from .types import (
+        BranchT,
+        CommitT,
+        DoltT,
+        KeyPairT,
+        RawJSON,
+        RemoteT,
+        StatusT,
+        TableT,
+    )
+    from .utils import (
+        CREATE,
+        FORCE_CREATE,
+        REPLACE,
+        UPDATE,
+        bulk_write,
+        columns_to_rows,
+        detach_head,
+        read_columns,
+        read_columns_sql,
+        read_rows,
+        read_rows_sql,
+        read_tuples_sql,
+        set_dolt_path,
+        write_columns,
+        write_file,
+        write_rows,
+        write_rows_stream,
+    )
+
+__all__ = [name for name in _LAZY if not name.startswith("_")]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    elif name in ("dolt", "types", "utils"):
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+# module level __getattr__ is only supported from Python 3.7
+if sys.version_info < (3, 7):
+    for _name in _LAZY:
+        __getattr__(_name)
@@ -1,16 +1,41 @@
 import csv
 import datetime
+import io
 import json
 import logging
 import os
+import re
 import shutil
+import socket
+import sys
 import tempfile
+import threading
+import time
 from collections import OrderedDict
-from subprocess import PIPE, Popen
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import fields
+from functools import lru_cache
+from subprocess import DEVNULL, PIPE, STDOUT, Popen, TimeoutExpired
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from weakref import finalize
 
+from . import utils
 from .types import BranchT, CommitT, DoltT, KeyPairT, RemoteT, StatusT, TableT
 from .utils import (
+    _sql_quote,
     read_columns,
     read_columns_sql,
     read_rows,
@@ -30,6 +55,74 @@ SQL_OUTPUT_PARSERS = {
     "json": lambda fh: json.load(fh),
 }
 
+# Commands, and the shape of queries, that are known not to modify the repository, anything else invalidates the
+# metadata cached on a Dolt instance.
+_READ_ONLY_COMMANDS = frozenset(["status", "log", "ls", "diff", "blame", "version"])
+_READ_ONLY_QUERY = re.compile(r"^\s*(select|show|describe|explain)\b", re.IGNORECASE)
+_DOLT_FUNCTION_CALL = re.compile(r"\bdolt_\w+\s*\(", re.IGNORECASE)
+
+# A row per commit and parent, filtered and limited by Commit.get_log_table_query
+_LOG_QUERY = """
+    select
+        dc.`commit_hash` as commit_hash,
+        dca.`parent_hash` as parent_hash,
+        `committer` as committer,
+        `email` as email,
+        `date` as date,
+        `message` as message
+    from
+        dolt_log as dc
+        left outer join dolt_commit_ancestors as dca
+            on dc.commit_hash = dca.commit_hash
+"""
+
+# The lines of `dolt status` output that are parsed, group 1 starts the staged section, the other headers the
+# unstaged ones, and groups 2 and 3 are modified and new tables
+_STATUS_LINE = re.compile(
+    r"[ \t]*(?:(Changes to be committed)|Changes not staged for commit|Untracked files"
+    r"|modified:[ \t]*(.*)|new table:[ \t]*(.*))"
+)
+
+# The error reported by `dolt creds check` or `dolt creds use`, from the line it starts on to the end of the output
+_CREDS_ERROR = re.compile(r"^error.*", re.MULTILINE | re.DOTALL)
+
+# The lines of `dolt ls --verbose` output that start the system tables, or say there are no tables
+_LS_SYSTEM_HEADER = "System"
+_LS_NO_TABLES = "No tables in working set"
+# A table line of `dolt ls --verbose`, the name is the first field and the row count the second to last
+_LS_TABLE_LINE = re.compile(r"[ \t]*(\S+)(?:[ \t]+\S+)*?[ \t]+(\d+)[ \t]+\S+\s*$")
+
+# The columns of the branch tables differ between dolt versions, so every column is selected and matched to the
+# BranchT fields by name, see _branch_rows. The local listing carries the active branch in a trailing column, so it
+# is read in the same round trip.
+_LOCAL_BRANCHES_QUERY = "select * from dolt_branches"
+_LOCAL_BRANCHES_WITH_ACTIVE_QUERY = "select *, active_branch() from dolt_branches"
+_REMOTE_BRANCHES_QUERY = "select * from dolt_remote_branches"
+
+# Read buffer for output streamed from a dolt process, large enough that big outputs take few reads
+_PIPE_BUFFER_SIZE = 1 << 20
+
+# How many times a sql-server is started before giving up, see _DoltSqlServer
+_SERVER_START_ATTEMPTS = 3
+
+# How many clones or fetches clone_many and fetch_many run at once, unless told otherwise or set by $DOLTCLI_JOBS
+_DEFAULT_JOBS = 8
+
+# Descriptors Python opens are not inherited (PEP 446), so on POSIX the child does not need every descriptor up to
+# the open file limit closed for it, which is a loop over all of them where the limit is high
+_CLOSE_FDS = os.name != "posix"
+
+# CLI commands that have a stored procedure equivalent, and can be run on a sql-server connection
+_SQL_PROCEDURES = {
+    "add": "DOLT_ADD",
+    "branch": "DOLT_BRANCH",
+    "commit": "DOLT_COMMIT",
+    "fetch": "DOLT_FETCH",
+    "pull": "DOLT_PULL",
+    "push": "DOLT_PUSH",
+    "reset": "DOLT_RESET",
+}
+
 
 class DoltException(Exception):
 
@@ -66,28 +159,409 @@ class DoltDirectoryException(Exception):
         self.message = message
 
 
-def _execute(args: List[str], cwd: Optional[str] = None, outfile: Optional[str] = None):
-    from .utils import DOLT_PATH
+def _command_line(args: List[str]) -> str:
+    return " ".join(" ".join(args).split())
+
 
-    _args = [DOLT_PATH] + args
-    str_args = " ".join(" ".join(args).split())
-    logger.info(str_args)
+def _log_command(args: List[str]):
+    # only build the command line if it is going to be logged
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(_command_line(args))
+
+
+def _execute(
+    args: List[str],
+    cwd: Optional[str] = None,
+    outfile: Optional[str] = None,
+    capture: bool = True,
+):
+    """
+    Runs a dolt command and returns its output, or outfile if the output was sent there. With capture set to False
+    the output is discarded and an empty string returned, the error output is only decoded if the command fails.
+    """
+    _args = [utils.DOLT_PATH] + args
+    _log_command(args)
     if outfile:
         with open(outfile, "w", newline="") as f:
-            proc = Popen(args=_args, cwd=cwd, stdout=f, stderr=PIPE)
+            proc = Popen(args=_args, cwd=cwd, stdout=f, stderr=PIPE, close_fds=_CLOSE_FDS)
     else:
-        proc = Popen(args=_args, cwd=cwd, stdout=PIPE, stderr=PIPE)
-    out, err = (val.decode("utf8") if val else "" for val in proc.communicate())
+        proc = Popen(
+            args=_args,
+            cwd=cwd,
+            stdout=PIPE if capture else DEVNULL,
+            stderr=PIPE,
+            close_fds=_CLOSE_FDS,
+        )
+    out, err = proc.communicate()
     exitcode = proc.returncode
 
     if exitcode != 0:
-        logger.error(err)
-        raise DoltException(str_args, out, err, exitcode)
+        output, error = (val.decode("utf8") if val else "" for val in (out, err))
+        logger.error(error)
+        raise DoltException(_command_line(args), output, error, exitcode)
 
     if outfile:
         return outfile
     else:
-        return out
+        return out.decode("utf8") if out else ""
+
+
+def _execute_many(commands: List[List[str]], cwd: Optional[str] = None) -> List[str]:
+    """
+    Starts a dolt process for each command before waiting on any of them, so their start up overlaps, and returns
+    their outputs in order. The first failure is raised once every process has finished.
+    """
+    procs: List[Tuple[List[str], Popen]] = []
+    try:
+        for args in commands:
+            _log_command(args)
+            proc = Popen(
+                args=[utils.DOLT_PATH] + args,
+                cwd=cwd,
+                stdout=PIPE,
+                stderr=PIPE,
+                close_fds=_CLOSE_FDS,
+            )
+            procs.append((args, proc))
+    except OSError:
+        for _, proc in procs:
+            proc.kill()
+            proc.communicate()
+        raise
+
+    outputs = []
+    failure: Optional[DoltException] = None
+    for args, proc in procs:
+        out, err = (val.decode("utf8") if val else "" for val in proc.communicate())
+        if proc.returncode != 0 and failure is None:
+            logger.error(err)
+            failure = DoltException(_command_line(args), out, err, proc.returncode)
+        outputs.append(out)
+
+    if failure is not None:
+        raise failure
+    return outputs
+
+
+def _execute_lines(args: List[str], cwd: Optional[str] = None) -> Iterator[str]:
+    """
+    Like `_execute`, but yields the lines of the output as dolt writes them, rather than buffering all of it. The
+    process is killed if the caller stops iterating early.
+    """
+    _log_command(args)
+    # the error output goes to a file rather than a second pipe, which dolt would block on once it filled up while
+    # the output is still being read
+    with tempfile.TemporaryFile() as errfile:
+        with Popen(
+            args=[utils.DOLT_PATH] + args,
+            cwd=cwd,
+            stdout=PIPE,
+            stderr=errfile,
+            bufsize=_PIPE_BUFFER_SIZE,
+            close_fds=_CLOSE_FDS,
+        ) as proc:
+            assert proc.stdout is not None
+            try:
+                for line in proc.stdout:
+                    yield line.decode("utf8")
+                proc.wait()
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+        exitcode = proc.returncode
+
+        if exitcode != 0:
+            errfile.seek(0)
+            err = errfile.read().decode("utf8")
+            logger.error(err)
+            raise DoltException(_command_line(args), None, err, exitcode)
+
+
+@lru_cache(maxsize=None)
+def _version(dolt_path: str) -> str:
+    # keyed by the binary, so set_dolt_path picks up the version of the new one
+    return _execute(["version"], cwd=os.getcwd()).split(" ")[2].strip()
+
+
+def _is_read_only(args: List[str]) -> bool:
+    """
+    Conservatively decides whether a dolt command leaves the repository untouched. A SQL query is only considered
+    read-only if it is a single SELECT/SHOW style statement that does not call any dolt_* function or procedure.
+    """
+    if not args:
+        return False
+    if args[0] in _READ_ONLY_COMMANDS:
+        return True
+    if args[0] == "sql" and "--query" in args:
+        query = args[args.index("--query") + 1].strip().rstrip(";")
+        if ";" in query or _DOLT_FUNCTION_CALL.search(query):
+            return False
+        return bool(_READ_ONLY_QUERY.match(query))
+    return False
+
+
+def _read_config_file(path: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(path) as f:
+            configs = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(configs, dict) or not all(
+        isinstance(value, str) for value in configs.values()
+    ):
+        return None
+    return configs
+
+
+def _loadable(kwargs: Dict[str, Any]) -> bool:
+    # an update from a CSV file is the only import LOAD DATA does the same way as `dolt table import`
+    if not kwargs.get("update_table") or set(kwargs) - {
+        "table",
+        "filename",
+        "update_table",
+        "file_type",
+        "delim",
+    }:
+        return False
+    file_type = kwargs.get("file_type")
+    return file_type == "csv" or (
+        file_type is None and str(kwargs["filename"]).endswith(".csv")
+    )
+
+
+def _branch_rows(columns: List[str], rows: List[tuple]) -> List[tuple]:
+    # the values of each row in the order of the Branch fields, None for the columns this version of dolt lacks
+    index = {column: i for i, column in enumerate(columns)}
+    positions = [index.get(field.name) for field in fields(BranchT)]
+    return [tuple(None if i is None else row[i] for i in positions) for row in rows]
+
+
+def _load_data_statement(
+    table: str, filename: str, delim: str, columns: Set[str]
+) -> Optional[str]:
+    """
+    The LOAD DATA statement that updates the table from the CSV file as `dolt table import -u` would, or None if the
+    file has something the two treat differently: REPLACE resets the columns missing from the header where an update
+    keeps them, empty fields load as '' or 0 rather than NULL, and the lines must share one terminator.
+    :param columns: the lowercased names of the table's columns
+    """
+    endings: Set[str] = set()
+
+    def lines(f):
+        for line in f:
+            end = len(line.rstrip("\r\n"))
+            endings.add(line[end:])
+            yield line
+
+    # newline="" leaves the terminators in place, so they can be checked
+    with open(filename, newline="") as f:
+        reader = csv.reader(lines(f), delimiter=delim)
+        header = next(reader, [])
+        if {column.lower() for column in header} != columns or any(
+            "" in row for row in reader
+        ):
+            return None
+    # the last line need not be terminated
+    endings.discard("")
+    if len(endings) > 1:
+        return None
+    # written as escapes, so the statement stays on one line
+    terminator = (endings.pop() if endings else "\n").replace("\r", "\\r").replace("\n", "\\n")
+
+    # the columns are matched to the file by its header, as `dolt table import` does, rather than by position
+    names = ", ".join("`{}`".format(column.replace("`", "``")) for column in header)
+    return (
+        f"LOAD DATA INFILE {_sql_quote(os.path.abspath(filename))} REPLACE INTO TABLE `{table.replace('`', '``')}` "
+        f"FIELDS TERMINATED BY {_sql_quote(delim)} ENCLOSED BY '\"' LINES TERMINATED BY '{terminator}' "
+        f"IGNORE 1 LINES ({names});"
+    )
+
+
+def _options(*options: Tuple[str, Any]) -> List[str]:
+    """
+    The command line arguments for the (flag, value) pairs that are set, a value of True gives the flag on its own and
+    any other value the flag followed by the value.
+    """
+    args: List[str] = []
+    for flag, value in options:
+        if value is True:
+            args.append(flag)
+        elif value:
+            args.extend((flag, str(value)))
+    return args
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _to_csv_value(value: Any) -> str:
+    # mirror the values `dolt sql --result-format csv` produces, so both paths parse to the same rows
+    if value is None:
+        return ""
+    elif isinstance(value, bytes):
+        return value.decode("utf8")
+    return str(value)
+
+
+def _to_json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    elif isinstance(value, bytes):
+        return value.decode("utf8")
+    return str(value)
+
+
+class _DoltSqlServer:
+    """
+    A `dolt sql-server` child process serving a single repository over a UNIX socket, along with a connection to it
+    per thread. Starting the server is paid for once, after which each query is a round trip on the socket rather
+    than a new `dolt` process that has to start up and open the repository.
+    """
+
+    def __init__(self, repo_dir: str, database: str, timeout: float = 30):
+        try:
+            import pymysql  # type: ignore
+        except ImportError:
+            raise ImportError(
+                "use_sql_server requires pymysql, install it with `pip install pymysql`"
+            )
+
+        self._dir = tempfile.mkdtemp()
+        self._local = threading.local()
+        self._conns: List[Any] = []
+        self._conns_lock = threading.Lock()
+        self.socket = os.path.join(self._dir, "dolt.sock")
+        deadline = time.monotonic() + timeout
+        # the free port found is released before dolt binds it, and may be taken in between, in which case dolt
+        # exits and is started again on another port
+        for attempt in range(_SERVER_START_ATTEMPTS):
+            output = self._start(repo_dir, deadline)
+            if output is None:
+                break
+            if self.proc.returncode is None or attempt == _SERVER_START_ATTEMPTS - 1:
+                self.close()
+                raise DoltServerNotRunningException(
+                    f"dolt sql-server failed to start:\n{output}"
+                )
+
+        self._pymysql = pymysql
+        self._error = pymysql.MySQLError
+        self._database = database
+        # the connection to use on this thread is opened now, so a server that cannot be reached fails here
+        try:
+            self.conn
+        except self._error as e:
+            self.close()
+            raise DoltServerNotRunningException(
+                f"could not connect to dolt sql-server: {e}"
+            ) from e
+
+    def _start(self, repo_dir: str, deadline: float) -> Optional[str]:
+        # starts the server and waits for its socket, returns the server's output if it exited or timed out first
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        args = [utils.DOLT_PATH, "sql-server", "--host", "127.0.0.1", "--port", str(port)]
+        args.extend(["--socket", self.socket])
+        logger.info(" ".join(args))
+        log_path = os.path.join(self._dir, "server.log")
+        with open(log_path, "w") as log:
+            self.proc = Popen(args=args, cwd=repo_dir, stdout=log, stderr=STDOUT)
+
+        while not os.path.exists(self.socket):
+            if self.proc.poll() is not None or time.monotonic() > deadline:
+                with open(log_path) as log:
+                    return log.read()
+            time.sleep(0.05)
+        return None
+
+    @property
+    def conn(self):
+        # a pymysql connection must not be shared between threads, and submit runs statements on its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._pymysql.connect(
+                unix_socket=self.socket,
+                user="root",
+                database=self._database,
+                autocommit=True,
+                client_flag=self._pymysql.constants.CLIENT.MULTI_STATEMENTS,
+            )
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def _fetch(self, query: str) -> Tuple[List[str], List[tuple]]:
+        # rows are read as tuples and paired with the column names by position, a DictCursor renames a duplicate
+        # column, such as the id of both tables of a join, to `table.column`
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(query)
+                columns = [column[0] for column in cursor.description or []]
+                rows = cursor.fetchall() if cursor.description else []
+                while cursor.nextset():
+                    pass
+        except self._error as e:
+            logger.error(e)
+            raise DoltException(query, None, str(e)) from e
+        return columns, rows
+
+    def query(self, query: str, result_format: Optional[str] = None) -> Any:
+        columns, rows = self._fetch(query)
+        if result_format == "csv":
+            return [{k: _to_csv_value(v) for k, v in zip(columns, row)} for row in rows]
+        elif result_format == "tuples":
+            return [tuple(_to_csv_value(v) for v in row) for row in rows]
+        elif result_format == "json":
+            return {
+                "rows": [{k: _to_json_value(v) for k, v in zip(columns, row)} for row in rows]
+            }
+        return [dict(zip(columns, row)) for row in rows]
+
+    def query_tuples(self, query: str) -> Tuple[List[str], List[tuple]]:
+        """
+        The names of the selected columns, and the rows as tuples of CSV formatted values in that order.
+        """
+        columns, rows = self._fetch(query)
+        return columns, [tuple(_to_csv_value(v) for v in row) for row in rows]
+
+    def query_to_file(self, query: str, path: str) -> str:
+        """
+        Writes the result of the query to path in the CSV format `dolt sql --result-format csv` produces.
+        """
+        columns, rows = self._fetch(query)
+        with open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(columns)
+            writer.writerows([_to_csv_value(v) for v in row] for row in rows)
+        return path
+
+    def call(self, args: List[str]) -> str:
+        procedure = _SQL_PROCEDURES[args[0]]
+        self.query(
+            "CALL {}({})".format(procedure, ", ".join(_sql_quote(arg) for arg in args[1:]))
+        )
+        return ""
+
+    def close(self):
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            if conn.open:
+                conn.close()
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except TimeoutExpired:
+                self.proc.kill()
+        shutil.rmtree(self._dir, ignore_errors=True)
 
 
 class Status(StatusT):
@@ -138,50 +612,21 @@ class Commit(CommitT):
         commit: Optional[str] = None,
         head: Optional[str] = None,
     ):
-        base = """
-            select
-                dc.`commit_hash` as commit_hash,
-                dca.`parent_hash` as parent_hash,
-                `committer` as committer,
-                `email` as email,
-                `date` as date,
-                `message` as message
-            from
-                dolt_log as dc
-                left outer join dolt_commit_ancestors as dca
-                    on dc.commit_hash = dca.commit_hash
-        """
-
+        query = _LOG_QUERY
         if commit is not None:
-            base += f"\nWHERE dc.`commit_hash`='{commit}'"
+            query += f"\nWHERE dc.`commit_hash`={_sql_quote(commit)}"
 
-        base += "\nORDER BY `date` DESC"
+        query += "\nORDER BY `date` DESC"
 
         if number is not None:
-            base += f"\nLIMIT {number}"
+            query += f"\nLIMIT {int(number)}"
 
-        return base
+        return query
 
     @classmethod
     def parse_dolt_log_table(cls, rows: List[dict]) -> Dict:
-        commits: Dict[str, Commit] = OrderedDict()
-        for row in rows:
-            ref = row["commit_hash"]
-            if ref in commits:
-                commits[ref].append_parent(row["parent_hash"])
-            else:
-                commit = Commit(
-                    ref=row["commit_hash"],
-                    timestamp=row["date"],
-                    author=row["committer"],
-                    email=row["email"],
-                    message=row["message"],
-                    parents=row["parent_hash"],
-                    merge=False,
-                )
-                commits[ref] = commit
-
-        return commits
+        # an OrderedDict rather than a dict, callers take the oldest commit with popitem(last=False)
+        return OrderedDict(CommitTable(rows).items())
 
 
 class KeyPair(KeyPairT):
@@ -212,6 +657,149 @@ class Remote(RemoteT):
     pass
 
 
+class BranchBatch:
+    """
+    Records branch operations so they can be sent to Dolt as a single `dolt sql` invocation of `DOLT_BRANCH` calls,
+    see `Dolt.branch_batch`. Once the batch has been executed `result` holds the active branch and the branches.
+    """
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+        self.result: Optional[Tuple[Branch, List[Branch]]] = None
+
+    def create(self, branch_name: str, start_point: Optional[str] = None, force: bool = False):
+        args = ["--force"] if force else []
+        args.append(branch_name)
+        if start_point:
+            args.append(start_point)
+        self.calls.append(args)
+
+    def delete(self, branch_name: str, force: bool = False):
+        self.calls.append((["--force"] if force else []) + ["--delete", branch_name])
+
+    def copy(self, branch_name: str, new_branch: str, force: bool = False):
+        self.calls.append((["--force"] if force else []) + ["--copy", branch_name, new_branch])
+
+    def move(self, branch_name: str, new_branch: str, force: bool = False):
+        self.calls.append((["--force"] if force else []) + ["--move", branch_name, new_branch])
+
+    def to_sql(self) -> str:
+        return " ".join(
+            "CALL DOLT_BRANCH({});".format(", ".join(_sql_quote(arg) for arg in args))
+            for args in self.calls
+        )
+
+
+class BranchTable(Sequence):
+    """
+    A listing of branches stored column by column, so projecting a single column such as `names` is a lookup rather
+    than an attribute fetch per branch. Indexing and iteration still yield `Branch` objects.
+    """
+
+    _fields = tuple(field.name for field in fields(Branch))
+
+    def __init__(self, rows: List[tuple]):
+        # remote branches have no `remote` and `branch` columns, pad them so every row has a value for each field
+        width = len(self._fields)
+        padded = (tuple(row) + (None,) * (width - len(row)) for row in rows)
+        self.columns: Dict[str, tuple] = dict(
+            zip(self._fields, zip(*padded) if rows else [()] * width)
+        )
+        # many branches usually point at the same few commits, share one string per distinct hash
+        self.columns["hash"] = tuple(sys.intern(h) if h else h for h in self.columns["hash"])
+
+    @property
+    def names(self) -> tuple:
+        return self.columns["name"]
+
+    @property
+    def hashes(self) -> tuple:
+        return self.columns["hash"]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        # a new object per lookup, Branch is mutable and callers may set its fields
+        return Branch(*(self.columns[name][i] for name in self._fields))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other):
+        return (
+            list(self) == list(other)
+            if isinstance(other, (list, BranchTable))
+            else NotImplemented
+        )
+
+    def __repr__(self):
+        return f"BranchTable({list(self)!r})"
+
+
+class CommitTable(Mapping):
+    """
+    A log stored column by column, mapping each commit hash to its `Commit` in log order. Commits are only built
+    when they are looked up, so a large log costs a list entry per column rather than an object per commit.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.refs: List[str] = []
+        self.timestamps: List[Any] = []
+        self.authors: List[str] = []
+        self.emails: List[str] = []
+        self.messages: List[str] = []
+        self.parents: List[List[str]] = []
+        # the log has a row per parent, group them by commit
+        self._index: Dict[str, int] = {}
+        # this loop runs once per row of the log, so the lookups are bound up front
+        index, parents = self._index, self.parents
+        add_ref, add_timestamp, add_author = (
+            self.refs.append,
+            self.timestamps.append,
+            self.authors.append,
+        )
+        add_email, add_message, add_parents = (
+            self.emails.append,
+            self.messages.append,
+            parents.append,
+        )
+        for row in rows:
+            ref = row["commit_hash"]
+            i = index.get(ref)
+            if i is not None:
+                parents[i].append(row["parent_hash"])
+                continue
+            index[ref] = len(index)
+            add_ref(ref)
+            add_timestamp(row["date"])
+            add_author(row["committer"])
+            add_email(row["email"])
+            add_message(row["message"])
+            add_parents([row["parent_hash"]])
+
+    def __getitem__(self, ref: str) -> Commit:
+        i = self._index[ref]
+        parents = self.parents[i]
+        return Commit(
+            ref=ref,
+            timestamp=self.timestamps[i],
+            author=self.authors[i],
+            email=self.emails[i],
+            message=self.messages[i],
+            parents=list(parents) if len(parents) > 1 else parents[0],
+            merge=len(parents) > 1,
+        )
+
+    def __iter__(self):
+        return iter(self.refs)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __repr__(self):
+        return f"CommitTable({len(self)} commits)"
+
+
 class DoltHubContext:
     def __init__(
         self,
@@ -266,53 +854,155 @@ class Dolt(DoltT):
     launches an interactive shell.
     """
 
-    def __init__(self, repo_dir: str, print_output: Optional[bool] = None):
+    # config file -> (config file version, configs), see _config_helper
+    _config_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, str]]] = {}
+
+    def __init__(
+        self, repo_dir: str, print_output: Optional[bool] = None, use_sql_server: bool = False
+    ):
+        """
+        :param repo_dir: path to the Dolt repository
+        :param print_output: log the output of every command
+        :param use_sql_server: run queries, commands with a stored procedure equivalent, status, schema exports and
+            the table and remote listings against a `dolt sql-server` started on first use instead of starting a
+            `dolt` process per call. Requires pymysql, and the server should be stopped with `close`, or by using the
+            instance as a context manager. Other commands that write, such as checkout, merge and table import,
+            stop the server before running `dolt`, and it is started again on the next use. If the server fails to
+            start, a warning is logged and the instance runs `dolt` processes as it would without the server.
+        """
         # allow ~ to be used in paths
         repo_dir = os.path.expanduser(repo_dir)
         self.repo_dir = repo_dir
         self._print_output = print_output or False
+        self._use_sql_server = use_sql_server
+        self._server: Optional[_DoltSqlServer] = None
+        # held while the sql-server is started, submit, pipeline and merge use the instance from other threads
+        self._server_lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._submitter: Optional[ThreadPoolExecutor] = None
+        self._repo_name: Optional[Tuple[str, str]] = None
+        self._head: Optional[str] = None
+        self._tmpdir: Optional[str] = None
+        self._tmpdir_finalizer: Optional[finalize] = None
+        # (remote, all) -> (active_branch, branches), see _get_branches
+        self._branches_cache: Dict[Tuple[bool, bool], Tuple[Branch, BranchTable]] = {}
+        # (system, all) -> tables, see ls
+        self._ls_cache: Dict[Tuple[bool, bool], List[TableT]] = {}
 
         if not os.path.exists(os.path.join(self.repo_dir, ".dolt")):
             raise ValueError(f"{self.repo_dir} is not a valid Dolt repository")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Waits for submitted statements to finish, and stops the sql-server started for this instance, if any.
+        """
+        if self._submitter is not None:
+            self._submitter.shutdown(wait=True)
+            self._submitter = None
+        self._stop_server()
+        if self._tmpdir_finalizer is not None:
+            self._tmpdir_finalizer()
+            self._tmpdir, self._tmpdir_finalizer = None, None
+
+    def _result_path(self) -> str:
+        # one file per thread in a directory kept for the life of the instance, each query truncates it
+        tmpdir = self._tmpdir
+        if tmpdir is None:
+            with self._submit_lock:
+                tmpdir = self._tmpdir
+                if tmpdir is None:
+                    tmpdir = tempfile.mkdtemp()
+                    self._tmpdir_finalizer = finalize(
+                        self, shutil.rmtree, tmpdir, ignore_errors=True
+                    )
+                    self._tmpdir = tmpdir
+        return os.path.join(tmpdir, f"out-{threading.get_ident()}.csv")
+
+    @property
+    def _sql_server(self) -> _DoltSqlServer:
+        server = self._server
+        if server is None:
+            with self._server_lock:
+                server = self._server
+                if server is None:
+                    server = self._server = _DoltSqlServer(self.repo_dir, self.repo_name)
+        return server
+
+    def _stop_server(self):
+        with self._server_lock:
+            if self._server is not None:
+                self._server.close()
+                self._server = None
+
+    @property
+    def _served(self) -> bool:
+        # whether to go through the sql-server, which is started here on first use. If it cannot be started the
+        # instance falls back to running `dolt` processes, as it would without use_sql_server
+        if not self._use_sql_server:
+            return False
+        try:
+            self._sql_server
+        except (DoltServerNotRunningException, ImportError) as e:
+            logger.warning(f"Running dolt commands without a sql-server: {e}")
+            self._use_sql_server = False
+            return False
+        return True
+
     @property
     def repo_name(self):
-        return os.path.basename(os.path.normpath(self.repo_dir)).replace("-", "_")
+        # memoized against repo_dir, which callers are free to reassign
+        if self._repo_name is None or self._repo_name[0] != self.repo_dir:
+            name = os.path.basename(os.path.normpath(self.repo_dir)).replace("-", "_")
+            self._repo_name = (self.repo_dir, name)
+        return self._repo_name[1]
 
     @property
     def head(self):
-        head_hash = "HASHOF('HEAD')"
-        head_commit = self.sql(f"select {head_hash} as hash", result_format="csv")[0].get(
-            "hash", None
-        )
+        """
+        The commit hash of HEAD. It is cached until a command that may move HEAD is run through this instance, HEAD
+        moved by other processes or other instances is not observed until then.
+        """
+        if self._head is not None:
+            return self._head
+
+        head_commit = self._read_value("select HASHOF('HEAD') as hash", "hash")
         if not head_commit:
             raise ValueError("Head not found")
+        self._head = head_commit
         return head_commit
 
     @property
     def working(self):
-        working = self.sql(
-            f"select @@{self.repo_name}_working as working", result_format="csv"
-        )[0].get("working", None)
+        working = self._read_value(f"select @@{self.repo_name}_working as working", "working")
         if not working:
             raise ValueError("Working head not found")
         return working
 
     @property
     def active_branch(self):
-        active_branch = self.sql("select active_branch() as a", result_format="csv")[0].get(
-            "a", None
-        )
+        active_branch = self._read_value("select active_branch() as a", "a")
         if not active_branch:
             raise ValueError("Active branch not found")
         return active_branch
 
+    def _read_value(self, query: str, column: str) -> Any:
+        # JSON keeps the value as dolt returned it, with no CSV quoting to undo for a single cell
+        rows = self.sql(query, result_format="json").get("rows", [])
+        return rows[0].get(column) if rows else None
+
     def execute(
         self,
         args: List[str],
         print_output: Optional[bool] = None,
         stdout_to_file: str = None,
         error: bool = True,
+        capture: bool = True,
     ) -> str:
         """
         Manages executing a dolt command, pass all commands, sub-commands, and arguments as they would appear on the
@@ -320,20 +1010,25 @@ class Dolt(DoltT):
         :param args:
         :param print_output:
         :param stdout_to_file:
+        :param capture: keep the output, when False it is discarded unless it is printed
         :return:
         """
         if print_output and stdout_to_file is not None:
             raise ValueError("Cannot print output and send it to a file")
 
+        if not _is_read_only(args):
+            self._clear_caches()
+
+        print_output = print_output or self._print_output
+        capture = capture or bool(print_output)
         if not error:
             try:
-                output = _execute(args, self.repo_dir, outfile=stdout_to_file)
+                output = self._run(args, outfile=stdout_to_file, capture=capture)
             except DoltException as e:
                 output = repr(e)
         else:
-            output = _execute(args, self.repo_dir, outfile=stdout_to_file)
+            output = self._run(args, outfile=stdout_to_file, capture=capture)
 
-        print_output = print_output or self._print_output
         if print_output:
             logger.info(output)
 
@@ -342,6 +1037,74 @@ class Dolt(DoltT):
         else:
             return output
 
+    def pipeline(self, commands: List[List[str]]) -> List[str]:
+        """
+        Runs several independent dolt commands at the same time, rather than one after the other, and returns their
+        outputs in the order given. The commands must not depend on each others results, Dolt serializes writes to a
+        repository, so this is mostly useful for reads:
+
+            status, log = dolt.pipeline([["status"], ["log", "-n", "1"]])
+
+        :param commands: the arguments of each command, as they would be passed to `execute`
+        :return: the output of each command
+        """
+        if not all(_is_read_only(args) for args in commands):
+            self._clear_caches()
+            self._stop_server()
+        return _execute_many(commands, self.repo_dir)
+
+    def _run(
+        self, args: List[str], outfile: Optional[str] = None, capture: bool = True
+    ) -> str:
+        if outfile is None and len(args) > 1 and args[0] in _SQL_PROCEDURES and self._served:
+            return self._sql_server.call(args)
+        if not _is_read_only(args):
+            # the server holds the repository open, and its sessions would not follow a branch checked out by the
+            # CLI, so it is stopped before any other write and started again on the next use
+            self._stop_server()
+        return _execute(args, self.repo_dir, outfile=outfile, capture=capture)
+
+    def submit(self, query: str) -> Future:
+        """
+        Queues a statement to be executed in the background and returns a future that resolves once it has run.
+        Statements run one at a time, in the order submitted, each as its own query, so a failing statement sets its
+        exception on its own future only and leaves the others to run. Wait for the futures, or call `close`, before
+        relying on the changes.
+        :param query: the statement to execute
+        :return: Future
+        """
+        with self._submit_lock:
+            if self._submitter is None:
+                self._submitter = ThreadPoolExecutor(max_workers=1)
+            return self._submitter.submit(self._run_submitted, query)
+
+    def branch_async(
+        self, branch_name: str, start_point: Optional[str] = None, force: bool = False
+    ) -> Future:
+        """
+        Creates a branch through `submit`.
+        """
+        batch = BranchBatch()
+        batch.create(branch_name, start_point=start_point, force=force)
+        return self.submit(batch.to_sql())
+
+    def _run_submitted(self, query: str):
+        # run as `sql` does without a result format, minus its warning that no output comes back
+        args = ["sql", "--query", query]
+        if self._served:
+            self._sql_server_query(args, query)
+        else:
+            self.execute(args, capture=False)
+
+    def _clear_caches(self):
+        """
+        Drops the repository metadata cached on this instance, called before any command that may mutate the
+        repository is executed.
+        """
+        self._head = None
+        self._branches_cache.clear()
+        self._ls_cache.clear()
+
     @staticmethod
     def init(repo_dir: Optional[str] = None, error: bool = False) -> "Dolt":
         """
@@ -364,7 +1127,16 @@ class Dolt(DoltT):
 
     @staticmethod
     def version():
-        return _execute(["version"], cwd=os.getcwd()).split(" ")[2].strip()
+        return _version(utils.DOLT_PATH)
+
+    @classmethod
+    def clear_caches(cls):
+        """
+        Forgets what is cached for the whole process rather than a single instance: the version of each dolt binary
+        and the config listings. Useful when the dolt binary is replaced in place.
+        """
+        _version.cache_clear()
+        cls._config_cache.clear()
 
     def status(self, **kwargs) -> Status:
         """
@@ -374,36 +1146,62 @@ class Dolt(DoltT):
         new_tables: Dict[str, bool] = {}
         changes: Dict[str, bool] = {}
 
-        output = self.execute(["status"], print_output=False, **kwargs).split("\n")
+        if not kwargs and self._served:
+            return self._status_served()
 
-        if "clean" in str("\n".join(output)):
-            return Status(True, changes, new_tables)
+        if kwargs:
+            lines: Iterable[str] = self.execute(
+                ["status"], print_output=False, **kwargs
+            ).splitlines()
         else:
-            staged = False
-            for line in output:
-                _line = line.lstrip()
-                if _line.startswith("Changes to be committed"):
-                    staged = True
-                elif _line.startswith("Changes not staged for commit"):
-                    staged = False
-                elif _line.startswith("Untracked files"):
-                    staged = False
-                elif _line.startswith("modified"):
-                    changes[_line.split(":")[1].lstrip()] = staged
-                elif _line.startswith("new table"):
-                    new_tables[_line.split(":")[1].lstrip()] = staged
-                else:
-                    pass
+            lines = _execute_lines(["status"], self.repo_dir)
+
+        staged = False
+        for line in lines:
+            if "clean" in line:
+                return Status(True, {}, {})
+            match = _STATUS_LINE.match(line)
+            if match is None:
+                continue
+            group = match.lastindex
+            if group == 1:
+                staged = True
+            elif group == 2:
+                changes[match.group(2)] = staged
+            elif group == 3:
+                new_tables[match.group(3)] = staged
+            else:
+                staged = False
 
         return Status(False, changes, new_tables)
 
+    def _status_served(self) -> Status:
+        rows = self._sql_server.query("select table_name, staged, status from dolt_status")
+        if not rows:
+            return Status(True, {}, {})
+
+        new_tables: Dict[str, bool] = {}
+        changes: Dict[str, bool] = {}
+        for row in rows:
+            if row["status"] == "modified":
+                tables = changes
+            elif row["status"] == "new table":
+                tables = new_tables
+            else:
+                continue
+            # as in `dolt status`, a table with unstaged changes is not staged, even if some of its changes are
+            name = row["table_name"]
+            tables[name] = bool(row["staged"]) and tables.get(name, True)
+        return Status(False, changes, new_tables)
+
     def add(self, tables: Union[str, List[str]], **kwargs) -> Status:
         """
         Adds the table or list of tables in the working tree to staging.
         :param tables:
         :return:
         """
-        self.execute(["add"] + to_list(tables), **kwargs)
+        args = ["add", tables] if isinstance(tables, str) else ["add", *tables]
+        self.execute(args, capture=False, **kwargs)
         return self.status()
 
     def reset(
@@ -425,7 +1223,7 @@ class Dolt(DoltT):
         if not isinstance(tables, (str, list)):
             raise ValueError(f"tables should be: Union[str, List[str]]; found {type(tables)}")
 
-        to_reset = to_list(tables)
+        to_reset = [tables] if isinstance(tables, str) else tables
 
         args = ["reset"]
 
@@ -450,7 +1248,7 @@ class Dolt(DoltT):
         else:
             args += to_reset
 
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     def commit(
         self,
@@ -478,7 +1276,7 @@ class Dolt(DoltT):
             # TODO format properly
             args.extend(["--date", str(date)])
 
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     def merge(
         self, branch: str, message: Optional[str] = None, squash: bool = False, **kwargs
@@ -493,8 +1291,9 @@ class Dolt(DoltT):
         :param squash: squash the commits from the merged branch into a single commit
         :return:
         """
+        status = self.status()
         current_branch, branches = self._get_branches()
-        if not self.status().is_clean:
+        if not status.is_clean:
             err = f"Changes in the working set, please commit before merging {branch} to {current_branch.name}"
             raise ValueError(err)
         if branch not in [branch.name for branch in branches]:
@@ -528,7 +1327,7 @@ class Dolt(DoltT):
             )
             logger.warning("Aborting as interactive merge not supported in Doltpy")
             abort_args = ["merge", "--abort"]
-            self.execute(abort_args)
+            self.execute(abort_args, capture=False)
             return
 
         if message is None:
@@ -563,6 +1362,8 @@ class Dolt(DoltT):
         :return:
         """
         args = ["sql"]
+        # plain queries go to the SQL server when there is one, the other modes are only supported by `dolt sql`
+        served = not any([execute, save, list_saved, batch, multi_db_dir]) and self._served
 
         if list_saved:
             if any([query, result_format, save, message, batch, multi_db_dir]):
@@ -592,24 +1393,26 @@ class Dolt(DoltT):
                 raise ValueError("Must provide a query in order to specify a result format")
             args.extend(["--query", query])
 
-            try:
-                d = tempfile.mkdtemp()
-                args.extend(["--result-format", "csv"])
-                f = os.path.join(d, "tmpfile")
+            if not hasattr(result_parser, "__call__"):
+                raise ValueError(
+                    f"Invalid argument: `result_parser` should be Callable; found {type(result_parser)}"
+                )
+            args.extend(["--result-format", "csv"])
+
+            f = self._result_path()
+            if served:
+                output_file = self._sql_server_query(args, query, result_file=f)
+            else:
                 output_file = self.execute(args, stdout_to_file=f, **kwargs)
-                if not hasattr(result_parser, "__call__"):
-                    raise ValueError(
-                        f"Invalid argument: `result_parser` should be Callable; found {type(result_parser)}"
-                    )
-                return result_parser(output_file)
-            finally:
-                shutil.rmtree(d, ignore_errors=True, onerror=None)
+            return result_parser(output_file)
         elif result_file is not None:
             if query is None:
                 raise ValueError("Must provide a query in order to specify a result format")
             args.extend(["--query", query])
 
             args.extend(["--result-format", "csv"])
+            if served:
+                return self._sql_server_query(args, query, result_file=result_file)
             output_file = self.execute(args, stdout_to_file=result_file, **kwargs)
             return output_file
         elif result_format in ["csv", "json"]:
@@ -617,22 +1420,37 @@ class Dolt(DoltT):
                 raise ValueError("Must provide a query in order to specify a result format")
             args.extend(["--query", query])
 
-            try:
-                d = tempfile.mkdtemp()
-                f = os.path.join(d, "tmpfile")
-                args.extend(["--result-format", result_format])
-                output_file = self.execute(args, stdout_to_file=f, **kwargs)
-                with open(output_file, newline="") as fh:
-                    return SQL_OUTPUT_PARSERS[result_format](fh)
-            finally:
-                shutil.rmtree(d, ignore_errors=True, onerror=None)
+            if served:
+                return self._sql_server_query(args, query, result_format=result_format)
+
+            # the output is parsed straight from the process' stdout, rather than through a file
+            args.extend(["--result-format", result_format])
+            output = self.execute(args, **kwargs)
+            return SQL_OUTPUT_PARSERS[result_format](io.StringIO(output, newline=""))
 
         logger.warning("Must provide a value for result_format to get output back")
         if query is not None:
             args.extend(["--query", query])
 
+        if served and query is not None:
+            self._sql_server_query(args, query)
+            return
+
         self.execute(args, **kwargs)
 
+    def _sql_server_query(
+        self,
+        args: List[str],
+        query: str,
+        result_format: Optional[str] = None,
+        result_file: Optional[str] = None,
+    ):
+        if not _is_read_only(args):
+            self._clear_caches()
+        if result_file is not None:
+            return self._sql_server.query_to_file(query, result_file)
+        return self._sql_server.query(query, result_format)
+
     def log(self, number: Optional[int] = None, commit: Optional[str] = None) -> Dict:
         """
         Parses the log created by running the log command into instances of `Commit` that provide detail of the
@@ -643,11 +1461,24 @@ class Dolt(DoltT):
         """
         res = read_rows_sql(
             self,
-            sql=Commit.get_log_table_query(number=number, commit=commit, head=self.head),
+            sql=Commit.get_log_table_query(number=number, commit=commit),
         )
         commits = Commit.parse_dolt_log_table(res)
         return commits
 
+    def log_table(
+        self, number: Optional[int] = None, commit: Optional[str] = None
+    ) -> CommitTable:
+        """
+        Like `log`, but returns the commits column by column, see `CommitTable`, which is cheaper for large logs.
+        :param number:
+        :param commit:
+        :return:
+        """
+        return CommitTable(
+            read_rows_sql(self, sql=Commit.get_log_table_query(number=number, commit=commit))
+        )
+
     def diff(
         self,
         commit: Optional[str] = None,
@@ -691,7 +1522,7 @@ class Dolt(DoltT):
             args.append("--summary")
 
         if schema:
-            args.extend("--schema")
+            args.append("--schema")
 
         if sql:
             args.append("--sql")
@@ -702,7 +1533,7 @@ class Dolt(DoltT):
             args.append(other_commit)
 
         if tables:
-            args.append(" ".join(to_list(tables)))
+            args.extend(to_list(tables))
 
         self.execute(args, **kwargs)
 
@@ -739,7 +1570,8 @@ class Dolt(DoltT):
 
         If 'branch_name' is None, existing branches are listed, including remotely tracked branches
         if 'remote' or 'all' are set. If 'branch_name' is provided, a new branch is created, checked
-        our, deleted, moved or copied.
+        our, deleted, moved or copied. Listings are cached until a command that may change the branches is run
+        through this instance, changes made by other processes or other instances are not seen until then.
 
         :param branch_name: Name of branch to Checkout, create, delete, move, or copy.
         :param start_point: A commit that a new branch should point at.
@@ -760,8 +1592,18 @@ class Dolt(DoltT):
 
         :return: active_branch, branches
         """
-        switch_count = [el for el in [delete, copy, move] if el]
-        if len(switch_count) > 1:
+        # the output of a mutation is not used, unless the caller asks for it
+        kwargs.setdefault("capture", False)
+
+        # creating a branch is by far the most common call, so it is checked first
+        if branch_name and not (delete or copy or move):
+            args = ["branch", "--force", branch_name] if force else ["branch", branch_name]
+            if start_point:
+                args.append(start_point)
+            self.execute(args, **kwargs)
+            return self._get_branches()
+
+        if delete + copy + move > 1:
             raise ValueError("At most one of delete, copy, move can be set to True")
 
         if not any([branch_name, delete, copy, move]):
@@ -771,20 +1613,12 @@ class Dolt(DoltT):
                 )
             return self._get_branches(remote=remote, all=all)
 
-        args = ["branch"]
-        if force:
-            args.append("--force")
+        args = ["branch", "--force"] if force else ["branch"]
 
         def execute_wrapper(command_args: List[str]):
             self.execute(command_args, **kwargs)
             return self._get_branches()
 
-        if branch_name and not (delete or copy or move):
-            args.append(branch_name)
-            if start_point:
-                args.append(start_point)
-            return execute_wrapper(args)
-
         if copy:
             if not new_branch:
                 raise ValueError("must provide new_branch when copying a branch")
@@ -811,12 +1645,6 @@ class Dolt(DoltT):
             args.append(new_branch)
             return execute_wrapper(args)
 
-        if branch_name:
-            args.append(branch_name)
-            if start_point:
-                args.append(start_point)
-            return execute_wrapper(args)
-
         return self._get_branches(remote=remote, all=all)
 
     def _get_branches(self, remote: bool = False, all: bool = False) -> Tuple[Branch, List[Branch]]:
@@ -830,30 +1658,127 @@ class Dolt(DoltT):
         :param all: include both local and remotely tracked branches. Default is False
         :return: active_branch, branches
         """
-        local_dicts = read_rows_sql(self, sql="select * from dolt_branches")
-        dicts = []
-        if all:
-            dicts = local_dicts + read_rows_sql(self, sql="select * from dolt_remote_branches")
-        elif remote:
-            dicts = read_rows_sql(self, sql="select * from dolt_remote_branches")
-        else:
-            dicts = local_dicts
+        active_branch, table = self._get_branch_table(remote=remote, all=all)
+        return active_branch, list(table)
 
-        # find active_branch
-        ab_dicts = read_rows_sql(
-            self, "select * from dolt_branches where name = (select active_branch())"
-        )
-        if len(ab_dicts) != 1:
+    def _get_branch_table(
+        self, remote: bool = False, all: bool = False
+    ) -> Tuple[Branch, BranchTable]:
+        """
+        Like `_get_branches`, but returns the branches as a `BranchTable`.
+        """
+        # The listing is cached until a command that may change the branches is run through this instance (see
+        # execute), branches created or moved by other processes or other instances are not seen until then.
+        key = (remote, all)
+        cached = self._branches_cache.get(key)
+        if cached is not None:
+            return cached
+
+        query = _LOCAL_BRANCHES_WITH_ACTIVE_QUERY
+        if remote and not all:
+            # only the active branch is needed from the local ones
+            query = f"{query} where name = active_branch()"
+        columns, local_rows = self._read_columns_and_tuples(query)
+        local = _branch_rows(columns[:-1], local_rows)
+        ab_rows = [branch for branch, row in zip(local, local_rows) if branch[0] == row[-1]]
+
+        # the remote branches are read on their own, a union needs both tables to have the same number of columns
+        rows = local if all or not remote else []
+        if remote or all:
+            rows = rows + _branch_rows(*self._read_columns_and_tuples(_REMOTE_BRANCHES_QUERY))
+
+        if len(ab_rows) != 1:
             raise ValueError(
                 "Ensure you have the latest version of Dolt installed, this is fixed as of 0.24.2"
             )
-        active_branch = Branch(**ab_dicts[0])
+        active_branch = Branch(*ab_rows[0])
         if not active_branch:
             raise DoltException("Failed to set active branch")
 
-        branches = [Branch(**d) for d in dicts]
+        table = BranchTable(rows)
+        self._branches_cache[key] = (active_branch, table)
+
+        return active_branch, table
+
+    def branch_table(self, remote: bool = False, all: bool = False) -> BranchTable:
+        """
+        Lists branches column by column, see `BranchTable`. This is cheaper than `branch` when only some of the
+        columns are needed, for example `dolt.branch_table().names`.
+
+        :param remote: include remotely tracked branches, see `branch`
+        :param all: include both local and remotely tracked branches, see `branch`
+        :return: the branches
+        """
+        _, table = self._get_branch_table(remote=remote, all=all)
+        return table
+
+    def get_branches(self, names: Optional[List[str]] = None) -> BranchTable:
+        """
+        Looks up the given local branches in a single query, rather than listing every branch and filtering. Names
+        that do not match a branch are left out of the result.
+
+        :param names: the branch names to look up, all local branches when None
+        :return: the matching branches
+        """
+        if names is None:
+            return self.branch_table()
+        if not names:
+            return BranchTable([])
+        where = ", ".join(_sql_quote(name) for name in names)
+        query = f"{_LOCAL_BRANCHES_QUERY} where name in ({where})"
+        return BranchTable(_branch_rows(*self._read_columns_and_tuples(query)))
+
+    def _read_columns_and_tuples(self, query: str) -> Tuple[List[str], List[tuple]]:
+        """
+        Runs a read-only query and returns the names of its columns, along with its rows as tuples of CSV formatted
+        values in column order, for queries that select `*` and pick the columns by name.
+        """
+        if self._served:
+            return self._sql_server.query_tuples(query)
+        reader = csv.reader(
+            _execute_lines(["sql", "--query", query, "--result-format", "csv"], self.repo_dir)
+        )
+        return next(reader, []), [tuple(row) for row in reader]
+
+    def sql_iter(self, query: str) -> Iterator[tuple]:
+        """
+        Runs a query and iterates over its rows as they are read from dolt, each row a tuple of CSV formatted values
+        in the order of the selected columns. Nothing is written to a file, and no dict is built per row.
+        :param query: query to be executed
+        :return: an iterator over the rows
+        """
+        args = ["sql", "--query", query, "--result-format", "csv"]
+        if self._served:
+            return iter(self._sql_server_query(args, query, result_format="tuples"))
+        if not _is_read_only(args):
+            self._clear_caches()
+        return self._iter_csv_rows(args)
+
+    def _iter_csv_rows(self, args: List[str]) -> Iterator[tuple]:
+        reader = csv.reader(_execute_lines(args, self.repo_dir))
+        next(reader, None)
+        for row in reader:
+            yield tuple(row)
+
+    @contextmanager
+    def branch_batch(self, **kwargs) -> Iterator[BranchBatch]:
+        """
+        Collects branch creations, deletions, copies and moves and executes them in a single `dolt sql` process on
+        exit, rather than one `dolt branch` process for each, followed by a single branch listing:
+
+            with dolt.branch_batch() as batch:
+                batch.create("feature-a")
+                batch.copy("main", "feature-b")
+            active_branch, branches = batch.result
 
-        return active_branch, branches
+        Nothing is executed if the body raises.
+        :return: BranchBatch
+        """
+        batch = BranchBatch()
+        yield batch
+        if batch.calls:
+            self.sql(query=batch.to_sql(), **kwargs)
+        batch.result = self._get_branches()
 
     def checkout(
         self,
@@ -886,13 +1811,13 @@ class Dolt(DoltT):
                 args.append(start_point)
 
         if tables:
-            args.append(" ".join(to_list(tables)))
+            args.extend(to_list(tables))
 
         if track is not None:
             args.append("--track")
             args.append(track)
 
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     def remote(
         self,
@@ -914,6 +1839,10 @@ class Dolt(DoltT):
         args = ["remote", "--verbose"]
 
         if not (add or remove):
+            if self._served:
+                rows = self._sql_server.query("select name, url from dolt_remotes")
+                return [Remote(row["name"], row["url"]) for row in rows]
+
             output = self.execute(args, print_output=False, **kwargs).split("\n")
 
             remotes = []
@@ -970,7 +1899,7 @@ class Dolt(DoltT):
             args.append(refspec)
 
         # just print the output
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     def pull(self, remote: str = "origin", branch: Optional[str] = None, **kwargs):
         """
@@ -983,7 +1912,7 @@ class Dolt(DoltT):
         if branch is not None:
             args.append(branch)
 
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     def fetch(
         self,
@@ -1008,7 +1937,7 @@ class Dolt(DoltT):
         if refspecs:
             args.extend(to_list(refspecs))
 
-        self.execute(args, **kwargs)
+        self.execute(args, capture=False, **kwargs)
 
     @staticmethod
     def clone(
@@ -1027,20 +1956,16 @@ class Dolt(DoltT):
         :param branch:
         :return:
         """
-        args = ["clone", remote_url]
-
-        if remote:
-            args.extend(["--remote", remote])
-
-        if branch:
-            args.extend(["--branch", branch])
-
         clone_dir = Dolt._get_clone_dir(new_dir, None if new_dir else remote_url)
         if not clone_dir:
             raise ValueError("Unable to infer new_dir")
 
-        args.append(clone_dir)
-
+        args = [
+            "clone",
+            remote_url,
+            *_options(("--remote", remote), ("--branch", branch)),
+            clone_dir,
+        ]
         _execute(args, **kwargs)
 
         return Dolt(clone_dir)
@@ -1055,9 +1980,10 @@ class Dolt(DoltT):
         if not (new_dir or remote_url):
             raise ValueError("Provide either new_dir or remote_url")
         elif remote_url:
-            split = remote_url.split("/")
-            inferred_dir = os.path.join(os.getcwd() if not new_dir else new_dir, split[-1])
-            if os.path.exists(inferred_dir):
+            # a trailing slash would otherwise infer the parent directory itself
+            name = os.path.basename(remote_url.rstrip("/"))
+            inferred_dir = os.path.join(new_dir or os.getcwd(), name)
+            if os.path.lexists(inferred_dir):
                 raise DoltDirectoryException(
                     f"Path already exists: {inferred_dir}. Cannot create new directory"
                 )
@@ -1083,17 +2009,18 @@ class Dolt(DoltT):
         :param new_dir:
         :return:
         """
-        args = ["read-tables"]
-
         clone_dir = Dolt._get_clone_dir(new_dir, None if new_dir else remote_url)
         if not clone_dir:
             raise ValueError("Unable to infer new_dir")
 
-        args.extend(["--dir", clone_dir, remote_url, committish])
-
-        if tables:
-            args.extend(to_list(tables))
-
+        args = [
+            "read-tables",
+            "--dir",
+            clone_dir,
+            remote_url,
+            committish,
+            *(to_list(tables) if tables else []),
+        ]
         _execute(args, cwd=new_dir)
 
         return Dolt(clone_dir)
@@ -1126,8 +2053,8 @@ class Dolt(DoltT):
 
         output = self.execute(args, print_output=False)
 
-        if output[0].startswith("failed"):
-            logger.error(output[0])
+        if output.startswith("failed"):
+            logger.error(output)
             raise DoltException("Tried to remove non-existent creds")
 
         return True
@@ -1139,18 +2066,16 @@ class Dolt(DoltT):
         """
         args = ["creds", "ls", "--verbose"]
 
-        output = self.execute(args, print_output=False)
-
         creds = []
-        for line in output:
-            if line.startswith("*"):
-                active = True
-                split = line[1:].lstrip().split(" ")
-            else:
-                active = False
-                split = line.lstrip().split(" ")
-
-            creds.append(KeyPair(split[0], split[1], active))
+        for line in _execute_lines(args, self.repo_dir):
+            # the active key is marked with a leading *, followed by the public key and its ID
+            line = line.rstrip()
+            active = line.startswith("*")
+            public_key, _, rest = (line[1:] if active else line).lstrip().partition(" ")
+            if not public_key:
+                continue
+            key_id, _, _ = rest.lstrip().partition(" ")
+            creds.append(KeyPair(public_key, key_id, active))
 
         return creds
 
@@ -1161,17 +2086,16 @@ class Dolt(DoltT):
         :param creds: creds identified by public key ID
         :return:
         """
-        args = ["dolt", "creds", "check"]
+        args = ["creds", "check"]
 
         if endpoint:
             args.extend(["--endpoint", endpoint])
         if creds:
             args.extend(["--creds", creds])
 
-        output = _execute(args, self.repo_dir)
-
-        if output[3].startswith("error"):
-            logger.error("\n".join(output[3:]))
+        error = _CREDS_ERROR.search(_execute(args, self.repo_dir))
+        if error:
+            logger.error(error.group())
             return False
 
         return True
@@ -1184,10 +2108,9 @@ class Dolt(DoltT):
         """
         args = ["creds", "use", public_key_id]
 
-        output = _execute(args, self.repo_dir)
-
-        if output and output[0].startswith("error"):
-            logger.error("\n".join(output[3:]))
+        error = _CREDS_ERROR.search(_execute(args, self.repo_dir))
+        if error:
+            logger.error(error.group())
             raise DoltException("Bad public key")
 
         return True
@@ -1199,7 +2122,9 @@ class Dolt(DoltT):
         :param no_profile:
         :return:
         """
-        raise NotImplementedError()
+        raise NotImplementedError(
+            "creds_import is not supported, run `dolt creds import` directly"
+        )
 
     @classmethod
     def config_global(
@@ -1305,23 +2230,73 @@ class Dolt(DoltT):
                 raise ValueError("For get, only name is provided")
             args.extend(["--unset", name])
 
-        output = _execute(args, cwd).split("\n")
-        result = {}
-        for line in [x for x in output if x is not None and "=" in x]:
-            split = line.split(" = ")
-            config_name, config_val = split[0], split[1]
-            result[config_name] = config_val
+        # `dolt config --list` output only changes with the config file, so it is kept against the file's mtime, and a
+        # get is answered from the listing rather than by a `dolt config --get` of its own
+        config_file = os.path.abspath(cls._config_file(global_config, cwd))
+        if add or unset:
+            _execute(args, cwd, capture=False)
+            cls._config_cache.pop(config_file, None)
+            return {}
+
+        version = _file_version(config_file)
+        cached = cls._config_cache.get(config_file)
+        configs: Dict[str, str]
+        if version is not None and cached is not None and cached[0] == version:
+            configs = cached[1]
+        else:
+            # the config file is a flat JSON object, which is what `dolt config --list` prints, so it is read directly
+            # and dolt is only asked when the file is missing or not in that shape
+            file_configs = _read_config_file(config_file) if version is not None else None
+            if file_configs is not None:
+                configs = file_configs
+            else:
+                list_args = args if list else args[:2] + ["--list"]
+                configs = {}
+                for line in _execute_lines(list_args, cwd):
+                    config_name, sep, config_val = line.rstrip("\r\n").partition(" = ")
+                    if sep:
+                        configs[config_name] = config_val
+            if version is not None:
+                cls._config_cache[config_file] = (version, configs)
+
+        if get and name:
+            return {name: configs[name]} if name in configs else {}
+        return dict(configs)
 
-        return result
+    @classmethod
+    def _config_file(cls, global_config: bool, cwd: Optional[str]) -> str:
+        if global_config:
+            root = os.environ.get("DOLT_ROOT_PATH") or os.path.expanduser("~")
+            return os.path.join(root, ".dolt", "config_global.json")
+        return os.path.join(cwd or os.getcwd(), ".dolt", "config.json")
 
-    def ls(self, system: bool = False, all: bool = False, **kwargs) -> List[TableT]:
+    def ls(
+        self, system: bool = False, all: bool = False, force_refresh: bool = False, **kwargs
+    ) -> List[TableT]:
         """
         List the tables in the working set, the system tables, or all. Parses the tables and their object hash into an
-        object that also provides row count.
+        object that also provides row count. The listing is cached until a command that may change the working set is
+        run through this instance, as `head` is, changes made by other processes are only seen with `force_refresh`.
         :param system:
         :param all:
+        :param force_refresh: list the tables again rather than returning the cached listing
         :return:
         """
+        key = (system, all)
+        if not (force_refresh or kwargs):
+            cached = self._ls_cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+        tables = self._ls(system, all, **kwargs)
+        if not kwargs:
+            self._ls_cache[key] = tables
+        return list(tables)
+
+    def _ls(self, system: bool, all: bool, **kwargs) -> List[TableT]:
+        if not (system or all) and self._served:
+            return self._ls_served()
+
         args = ["ls", "--verbose"]
 
         if all:
@@ -1330,34 +2305,49 @@ class Dolt(DoltT):
         if system:
             args.append("--system")
 
-        output = self.execute(args, print_output=False, **kwargs).split("\n")
-        tables: List[TableT] = []
-        system_pos = None
-
-        if len(output) == 3 and output[0] == "No tables in working set":
-            return tables
+        if kwargs:
+            lines: Iterable[str] = self.execute(
+                args, print_output=False, **kwargs
+            ).splitlines()
+        else:
+            lines = _execute_lines(args, self.repo_dir)
 
-        for i, line in enumerate(output):
-            if line.startswith("Tables") or not line:
-                pass
-            elif line.startswith("System"):
-                system_pos = i
+        # the user tables come first, followed by the system tables, if any, one name per line
+        tables: List[TableT] = []
+        in_system = False
+        for line in lines:
+            if in_system:
+                if line.strip():
+                    tables.append(Table(name=line.strip(), system=True))
+            elif line.startswith(_LS_SYSTEM_HEADER):
+                in_system = True
+            elif line.startswith(_LS_NO_TABLES):
                 break
             else:
-                if not line:
-                    pass
-                split = line.lstrip().split()
-                tables.append(Table(name=split[0], row_cnt=int(split[len(split)-2])))
-
-        if system_pos:
-            for line in output[system_pos:]:
-                if line.startswith("System"):
-                    pass
-                else:
-                    tables.append(Table(name=line.strip(), system=True))
+                match = _LS_TABLE_LINE.match(line)
+                if match is not None:
+                    tables.append(Table(name=match.group(1), row_cnt=int(match.group(2))))
 
         return tables
 
+    def _ls_served(self) -> List[TableT]:
+        names = [
+            name for (name,) in self._sql_server.query("show tables", result_format="tuples")
+        ]
+        if not names:
+            return []
+        # every table is counted in a single round trip
+        query = " union all ".join(
+            "select {} as name, count(*) as row_cnt from `{}`".format(
+                _sql_quote(name), name.replace("`", "``")
+            )
+            for name in names
+        )
+        return [
+            Table(name=row["name"], row_cnt=int(row["row_cnt"]))
+            for row in self._sql_server.query(query)
+        ]
+
     def schema_export(self, table: str, filename: Optional[str] = None):
         """
         Export the scehma of the table specified to the file path specified.
@@ -1365,16 +2355,17 @@ class Dolt(DoltT):
         :param filename:
         :return:
         """
-        args = ["schema", "export", table]
-
+        # the statement comes from the same query whether it is answered by the sql-server or the CLI, so the
+        # text written out does not depend on which one is in use
+        query = "show create table `{}`".format(table.replace("`", "``"))
+        rows = self.sql(query=query, result_format="json")["rows"]
+        statement = rows[0]["Create Table"] + ";\n"
         if filename:
-            args.extend([filename])
-            _execute(args, self.repo_dir)
-            return True
+            with open(filename, "w") as f:
+                f.write(statement)
         else:
-            output = _execute(args, self.repo_dir)
-            logger.info("\n".join(output))
-            return True
+            logger.info(statement)
+        return True
 
     def schema_import(
         self,
@@ -1414,36 +2405,24 @@ class Dolt(DoltT):
         if len(switch_count) != 1:
             raise ValueError("Exactly one of create, update, replace must be True")
 
-        args = ["schema", "import"]
-
-        if create:
-            args.append("--create")
-            if not pks:
-                raise ValueError("When create is set to True, pks must be provided")
-        if update:
-            args.append("--update")
-        if replace:
-            args.append("--replace")
-            if not pks:
-                raise ValueError("When replace is set to True, pks must be provided")
-        if dry_run:
-            args.append("--dry-run")
-        if keep_types:
-            args.append("--keep-types")
-        if file_type:
-            args.extend(["--file_type", file_type])
-        if pks:
-            args.extend(["--pks", ",".join(pks)])
-        if map:
-            args.extend(["--map", map])
-        if float_threshold:
-            args.extend(["--float-threshold", str(float_threshold)])
-        if delim:
-            args.extend(["--delim", delim])
-
-        args.extend([str(table), str(filename)])
-
-        self.execute(args)
+        if create and not pks:
+            raise ValueError("When create is set to True, pks must be provided")
+        if replace and not pks:
+            raise ValueError("When replace is set to True, pks must be provided")
+
+        options = _options(
+            ("--create", create),
+            ("--update", update),
+            ("--replace", replace),
+            ("--dry-run", dry_run),
+            ("--keep-types", keep_types),
+            ("--file_type", file_type),
+            ("--pks", pks and ",".join(pks)),
+            ("--map", map),
+            ("--float-threshold", float_threshold),
+            ("--delim", delim),
+        )
+        self.execute(["schema", "import", *options, str(table), str(filename)])
 
     def schema_show(self, tables: Union[str, List[str]], commit: Optional[str] = None):
         """
@@ -1468,7 +2447,9 @@ class Dolt(DoltT):
         :param tables:
         :return:
         """
-        self.execute(["rm", " ".join(to_list(tables))])
+        self.execute(
+            ["table", "rm", tables] if isinstance(tables, str) else ["table", "rm", *tables]
+        )
 
     def table_import(
         self,
@@ -1504,33 +2485,68 @@ class Dolt(DoltT):
         if len(switch_count) != 1:
             raise ValueError("Exactly one of create, update, replace must be True")
 
-        args = ["table", "import"]
-
-        if create_table:
-            args.append("--create-table")
-            if not pk:
-                raise ValueError("When create is set to True, pks must be provided")
-        if update_table:
-            args.append("--update-table")
-        if replace_table:
-            args.append("--replace-table")
-            if not pk:
-                raise ValueError("When replace is set to True, pks must be provided")
-        if file_type:
-            args.extend(["--file-type", file_type])
-        if pk:
-            args.extend(["--pk", ",".join(pk)])
-        if mapping_file:
-            args.extend(["--map", mapping_file])
-        if delim:
-            args.extend(["--delim", delim])
-        if continue_importing:
-            args.append("--continue")
-        if force:
-            args.append("--force")
+        if create_table and not pk:
+            raise ValueError("When create is set to True, pks must be provided")
+        if replace_table and not pk:
+            raise ValueError("When replace is set to True, pks must be provided")
+
+        options = _options(
+            ("--create-table", create_table),
+            ("--update-table", update_table),
+            ("--replace-table", replace_table),
+            ("--file-type", file_type),
+            ("--pk", pk and ",".join(pk)),
+            ("--map", mapping_file),
+            ("--delim", delim),
+            ("--continue", continue_importing),
+            ("--force", force),
+        )
+        self.execute(["table", "import", *options, table, filename])
 
-        args.extend([table, filename])
-        self.execute(args)
+    def table_import_many(self, imports: List[Dict[str, Any]]):
+        """
+        Runs several imports, each given as the keyword arguments of a `table_import` call, in order. Consecutive
+        updates of tables from CSV files, with no options besides delim, are loaded with `LOAD DATA` statements sent
+        to Dolt as a single query, rather than a `dolt table import` per file, when the file's header names every
+        column of the table and it has no empty fields. Any other import runs on its own.
+        :param imports: the keyword arguments of each import
+        :return:
+        """
+        statements: List[str] = []
+        columns: Optional[Dict[str, Set[str]]] = None
+        for kwargs in imports:
+            if _loadable(kwargs):
+                if columns is None:
+                    columns = self._table_columns()
+                table, filename = kwargs["table"], kwargs["filename"]
+                statement = _load_data_statement(
+                    table,
+                    filename,
+                    kwargs.get("delim") or ",",
+                    columns.get(table.lower(), set()),
+                )
+                if statement is not None:
+                    statements.append(statement)
+                    continue
+            if statements:
+                self.sql(query=" ".join(statements))
+                statements = []
+            self.table_import(**kwargs)
+        if statements:
+            self.sql(query=" ".join(statements))
+
+    def _table_columns(self) -> Dict[str, Set[str]]:
+        # lowercased table name -> lowercased column names, for every table of the current database
+        query = (
+            "select table_name as table_name, column_name as column_name from information_schema.columns "
+            "where table_schema = database()"
+        )
+        columns: Dict[str, Set[str]] = {}
+        for row in self.sql(query, result_format="csv"):
+            columns.setdefault(row["table_name"].lower(), set()).add(
+                row["column_name"].lower()
+            )
+        return columns
 
     def table_export(
         self,
@@ -1555,28 +2571,15 @@ class Dolt(DoltT):
         :param continue_exporting:
         :return:
         """
-        args = ["table", "export"]
-
-        if force:
-            args.append("--force")
-
-        if continue_exporting:
-            args.append("--continue")
-
-        if schema:
-            args.extend(["--schema", schema])
-
-        if mapping_file:
-            args.extend(["--map", mapping_file])
-
-        if pk:
-            args.extend(["--pk", ",".join(pk)])
-
-        if file_type:
-            args.extend(["--file-type", file_type])
-
-        args.extend([table, filename])
-        self.execute(args)
+        options = _options(
+            ("--force", force),
+            ("--continue", continue_exporting),
+            ("--schema", schema),
+            ("--map", mapping_file),
+            ("--pk", pk and ",".join(pk)),
+            ("--file-type", file_type),
+        )
+        self.execute(["table", "export", *options, table, filename])
 
     def table_mv(self, old_table: str, new_table: str, force: bool = False):
         """
@@ -1619,3 +2622,41 @@ class Dolt(DoltT):
 
         args.extend([old_table, new_table])
         self.execute(args)
+
+
+def _jobs(jobs: Optional[int]) -> int:
+    return jobs or int(os.environ.get("DOLTCLI_JOBS", _DEFAULT_JOBS))
+
+
+def clone_many(
+    remote_urls: List[str], new_dir: Optional[str] = None, jobs: Optional[int] = None
+) -> List[Dolt]:
+    """
+    Clones each of the databases into a directory named after it, several at a time, and returns them in the order
+    given. Each clone is its own `dolt` process, so threads are enough to run them side by side.
+    :param remote_urls: the databases to clone
+    :param new_dir: the directory to clone into, defaults to the current working directory
+    :param jobs: how many clones to run at once, defaults to $DOLTCLI_JOBS, or 8
+    :return:
+    """
+    parent = new_dir or os.getcwd()
+    clone_dirs = [Dolt._get_clone_dir(parent, remote_url) for remote_url in remote_urls]
+    with ThreadPoolExecutor(max_workers=_jobs(jobs)) as pool:
+        return list(
+            pool.map(lambda url, path: Dolt.clone(url, new_dir=path), remote_urls, clone_dirs)
+        )
+
+
+def fetch_many(dolts: List[Dolt], remote: str = "origin", jobs: Optional[int] = None):
+    """
+    Fetches from the named remote into each of the repositories, several at a time. The first failure is raised once
+    every fetch has finished.
+    :param dolts: the repositories to fetch into
+    :param remote: the remote to fetch from
+    :param jobs: how many fetches to run at once, defaults to $DOLTCLI_JOBS, or 8
+    :return:
+    """
+    with ThreadPoolExecutor(max_workers=_jobs(jobs)) as pool:
+        futures = [pool.submit(dolt.fetch, remote) for dolt in dolts]
+    for future in futures:
+        future.result()
@@ -1,21 +1,96 @@
+import copy
 import datetime
 import json
-from dataclasses import asdict, dataclass
-from typing import Any, Callable, Dict, List, Optional, Union
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, Union
+
+
+def _json_default(obj: Any) -> str:
+    # dates keep the str() format doltcli has always written, anything else json cannot encode is an error.
+    # isoformat with a space separator is what str() calls for a datetime, without going through __str__
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat(" ")
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class RawJSON:
+    """
+    A value that is already JSON, such as a parents array as Dolt returned it. `BaseDataclass.json` writes it out
+    verbatim instead of escaping it as a string, and `BaseDataclass.dict` gives the value it decodes to.
+    """
+
+    __slots__ = ("s",)
+
+    def __init__(self, s: str):
+        self.s = s
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.s!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, RawJSON) and other.s == self.s
 
 
 class Encoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, datetime.datetime):
-            return str(obj)
+        return _json_default(obj)
+
+
+# values dict() hands back as they are, checked first since they are nearly all of them
+_ATOMIC_TYPES = (str, int, float, datetime.date, type(None))
+
+
+def _dict_value(value: Any) -> Any:
+    # what asdict does for a field, without deep copying the values that do not need it
+    if isinstance(value, _ATOMIC_TYPES):
+        return value
+    if isinstance(value, BaseDataclass):
+        return value.dict()
+    if isinstance(value, RawJSON):
+        return json.loads(value.s)
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_dict_value(item) for item in value))
+    if isinstance(value, (list, tuple)):
+        return type(value)(_dict_value(item) for item in value)
+    if isinstance(value, dict):
+        return type(value)((key, _dict_value(item)) for key, item in value.items())
+    return copy.deepcopy(value)
 
 
 class BaseDataclass:
+    # the names of the dataclass fields, set on each class the first time _field_names is called for it
+    _names: ClassVar[Tuple[str, ...]]
+
+    @classmethod
+    def _field_names(cls) -> Tuple[str, ...]:
+        # read from the class' own __dict__, a subclass does not share the names of the class it extends
+        names = cls.__dict__.get("_names")
+        if names is None:
+            names = cls._names = tuple(field.name for field in fields(cls))  # type: ignore
+        return names
+
     def dict(self) -> Dict:
-        return asdict(self)
+        return {name: _dict_value(getattr(self, name)) for name in self._field_names()}
 
     def json(self) -> str:
-        return json.dumps(self.dict(), cls=Encoder)
+        names = self._field_names()
+        values = [getattr(self, name) for name in names]
+        if not any(isinstance(value, RawJSON) for value in values):
+            return json.dumps(self.dict(), default=_json_default)
+
+        # pre-serialized fields are spliced in as they are, with the separators json.dumps uses for the rest
+        items = []
+        for name, value in zip(names, values):
+            if isinstance(value, RawJSON):
+                encoded = value.s
+            else:
+                encoded = json.dumps(_dict_value(value), default=_json_default)
+            items.append(f"{json.dumps(name)}: {encoded}")
+        return "{" + ", ".join(items) + "}"
 
 
 @dataclass
@@ -143,7 +218,7 @@ class DoltT:
         multi_db_dir: Optional[str] = None,
         result_file: Optional[str] = None,
         result_parser: Optional[Callable[[str], Any]] = None,
-    ) -> List:
+    ) -> Any:
         ...
 
     def log(self, number: Optional[int] = ..., commit: Optional[str] = ...) -> Dict:
@@ -217,5 +292,7 @@ class DoltT:
     ) -> "DoltT":
         ...
 
-    def ls(self, system: bool = False, all: bool = False) -> List[TableT]:
+    def ls(
+        self, system: bool = False, all: bool = False, force_refresh: bool = False
+    ) -> List[TableT]:
         ...
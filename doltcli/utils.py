@@ -3,11 +3,13 @@ import datetime
 import io
 import logging
 import os
+import shutil
 import tempfile
 from collections import defaultdict
 from contextlib import contextmanager
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from .types import DoltT
 
@@ -21,6 +23,10 @@ def set_dolt_path(path: str):
     DOLT_PATH = path
 
 
+def _sql_quote(value: str) -> str:
+    return "'{}'".format(value.replace("\\", "\\\\").replace("'", "''"))
+
+
 def read_columns(dolt: DoltT, table: str, as_of: Optional[str] = None) -> Dict[str, list]:
     return read_columns_sql(dolt, get_read_table_asof_query(table, as_of))
 
@@ -35,21 +41,53 @@ def get_read_table_asof_query(table: str, as_of: Optional[str] = None) -> str:
 
 
 def read_columns_sql(dolt: DoltT, sql: str) -> Dict[str, list]:
-    rows = read_table_sql(dolt, sql)
-    columns = rows_to_columns(rows)
-    return columns
+    return dolt.sql(sql, result_parser=_read_csv_columns)
 
 
 def read_rows_sql(dolt: DoltT, sql: str) -> List[dict]:
     return read_table_sql(dolt, sql)
 
 
+def read_tuples_sql(dolt: DoltT, sql: str) -> List[tuple]:
+    """
+    Like `read_rows_sql`, but returns each row as a tuple of values in column order rather than a dict keyed by
+    column name, which saves building a dict per row when the columns are known up front.
+    """
+    return dolt.sql(sql, result_parser=_read_csv_tuples)
+
+
+def _read_csv_tuples(path: str) -> List[tuple]:
+    with open(path, newline="") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        return [tuple(row) for row in reader]
+
+
+def _read_csv_columns(path: str) -> Dict[str, list]:
+    # the values go straight from the CSV into their columns, without building a dict per row to transpose
+    with open(path, newline="") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        values: List[list] = [[] for _ in header]
+        appends = [column.append for column in values]
+        for row in reader:
+            for append, value in zip(appends, row):
+                append(value)
+    # as rows_to_columns did, a result without rows has no columns
+    if values and values[0]:
+        return dict(zip(header, values))
+    return {}
+
+
 def read_table_sql(
     dolt: DoltT, sql: str, result_parser: Optional[Callable[[str], Any]] = None
 ) -> List[dict]:
     return dolt.sql(sql, result_format="csv", result_parser=result_parser)
 
 
+# Buffer size for writing the files dolt imports, and chunk size for copying a file handle passed to write_file
+_BUFFER_SIZE = 1 << 20
+
 CREATE, FORCE_CREATE, REPLACE, UPDATE = "create", "force_create", "replace", "update"
 IMPORT_MODES_TO_FLAGS = {
     CREATE: ["-c"],
@@ -57,6 +95,8 @@ IMPORT_MODES_TO_FLAGS = {
     REPLACE: ["-r"],
     UPDATE: ["-u"],
 }
+_IMPORT_MODES = frozenset(IMPORT_MODES_TO_FLAGS)
+_IMPORT_MODES_STR = ", ".join(sorted(_IMPORT_MODES))
 
 
 def write_file(
@@ -77,26 +117,26 @@ def write_file(
         raise ValueError("Specify one of: file, file_handle")
     elif file_handle is None and file is None:
         raise ValueError("Specify one of: file, file_handle")
-    elif file_handle is not None:
 
-        def writer(filepath: str):
+    write_import_file: Optional[Callable[[str], str]] = None
+    if file_handle is not None:
+
+        def writer(filepath: str) -> str:
             if not isinstance(file_handle, io.TextIOBase):
                 raise ValueError(
                     f"file_handle expected type io.StringIO; found: {type(file_handle)}"
                 )
-            with open(filepath, "w", newline="") as f:
-                f.writelines(file_handle.readlines())
+            with open(filepath, "w", newline="", buffering=_BUFFER_SIZE) as f:
+                shutil.copyfileobj(file_handle, f, _BUFFER_SIZE)
             return filepath
 
-    elif file is not None:
-
-        def writer(filepath: str):
-            return str(file)
+        write_import_file = writer
 
     _import_helper(
         dolt=dolt,
         table=table,
-        write_import_file=writer,
+        write_import_file=write_import_file,
+        existing_path=None if file is None else str(file),
         primary_key=primary_key,
         import_mode=import_mode,
         commit=commit,
@@ -130,15 +170,17 @@ def write_columns(
     :return:
     """
 
-    def writer(filepath: str):
-        if len(list(set(len(col) for col in columns.values()))) != 1:
+    def writer(filepath: str) -> str:
+        lengths = map(len, columns.values())
+        first = next(lengths, None)
+        if first is None or any(length != first for length in lengths):
             raise ValueError("Must pass columns of identical length")
 
-        with open(filepath, "w", newline="") as f:
-            csv_writer = csv.DictWriter(f, columns.keys())
-            rows = columns_to_rows(columns)
-            csv_writer.writeheader()
-            csv_writer.writerows(rows)
+        with open(filepath, "w", newline="", buffering=_BUFFER_SIZE) as f:
+            # zip transposes the columns straight into CSV rows, without building a dict per row
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(columns.keys())
+            csv_writer.writerows(zip(*columns.values()))
         return filepath
 
     _import_helper(
@@ -177,16 +219,62 @@ def write_rows(
     :param commit_date:
     :return:
     """
+    _import_helper(
+        dolt=dolt,
+        table=table,
+        write_import_file=_rows_writer(rows),
+        primary_key=primary_key,
+        import_mode=import_mode,
+        commit=commit,
+        commit_message=commit_message,
+        commit_date=commit_date,
+        do_continue=do_continue,
+    )
 
-    def writer(filepath: str):
-        with open(filepath, "w", newline="") as f:
-            fieldnames: Set[str] = set()
-            for row in rows:
-                fieldnames = fieldnames.union(set(row.keys()))
 
-            csv_writer = csv.DictWriter(f, fieldnames)
-            csv_writer.writeheader()
-            csv_writer.writerows(rows)
+def write_rows_stream(
+    dolt: DoltT,
+    table: str,
+    rows: Iterable[dict],
+    import_mode: Optional[str] = None,
+    primary_key: Optional[List[str]] = None,
+    commit: Optional[bool] = False,
+    commit_message: Optional[str] = None,
+    commit_date: Optional[datetime.datetime] = None,
+    do_continue: Optional[bool] = False,
+):
+    """
+    Like `write_rows`, but takes any iterable of rows, for example a generator or an `itertools.chain` of several
+    batches, and writes them to the import file as they come, so they go to dolt in a single `table import`
+    without first being held in a list. Every row must have the columns of the first.
+
+    :param dolt:
+    :param table:
+    :param rows:
+    :param import_mode:
+    :param primary_key:
+    :param commit:
+    :param commit_message:
+    :param commit_date:
+    :return:
+    """
+
+    def writer(filepath: str) -> str:
+        row_iter = iter(rows)
+        first = next(row_iter, None)
+        with open(filepath, "w", newline="", buffering=_BUFFER_SIZE) as f:
+            if first is not None:
+                fieldnames = list(first)
+                get_values = itemgetter(*fieldnames)
+                csv_writer = csv.writer(f)
+                csv_writer.writerow(fieldnames)
+                if len(fieldnames) > 1:
+                    csv_writer.writerow(get_values(first))
+                    csv_writer.writerows(map(get_values, row_iter))
+                else:
+                    # itemgetter of a single name gives the value itself rather than a tuple
+                    csv_writer.writerow([get_values(first)])
+                    csv_writer.writerows([get_values(row)] for row in row_iter)
         return filepath
 
     _import_helper(
@@ -202,26 +290,105 @@ def write_rows(
     )
 
 
+def bulk_write(
+    dolt: DoltT,
+    tables: Iterable[Tuple[str, List[dict]]],
+    import_mode: Optional[str] = None,
+    primary_key: Optional[List[str]] = None,
+    commit: Optional[bool] = False,
+    commit_message: Optional[str] = None,
+    commit_date: Optional[datetime.datetime] = None,
+):
+    """
+    Writes the rows of each (table, rows) pair as `write_rows` would, listing the existing tables once for all of
+    them rather than once per table, and commits them together.
+
+    :param dolt:
+    :param tables:
+    :param import_mode:
+    :param primary_key:
+    :param commit:
+    :param commit_message:
+    :param commit_date:
+    :return:
+    """
+    known_tables = None if import_mode else {table.name for table in dolt.ls()}
+    written = []
+    for table, rows in tables:
+        _import_helper(
+            dolt=dolt,
+            table=table,
+            write_import_file=_rows_writer(rows),
+            primary_key=primary_key,
+            import_mode=import_mode,
+            known_tables=known_tables,
+        )
+        if known_tables is not None:
+            known_tables.add(table)
+        written.append(table)
+
+    if commit and written:
+        dolt.add(written)
+        dolt.commit(
+            commit_message or f"Committing write to tables {', '.join(written)}",
+            date=commit_date,
+        )
+
+
+def _rows_writer(rows: List[dict]) -> Callable[[str], str]:
+    def writer(filepath: str) -> str:
+        with open(filepath, "w", newline="", buffering=_BUFFER_SIZE) as f:
+            first_keys = rows[0].keys() if rows else {}.keys()
+            if len(first_keys) > 1 and all(row.keys() == first_keys for row in rows):
+                # every row has the same columns, so they are read out as a tuple per row, skipping DictWriter's
+                # checks of each row's keys
+                fieldnames = list(first_keys)
+                csv_writer = csv.writer(f)
+                csv_writer.writerow(fieldnames)
+                csv_writer.writerows(map(itemgetter(*fieldnames), rows))
+            else:
+                # the header is the union of the columns, a row missing any of them gets empty values
+                union: Dict[str, None] = {}
+                for row in rows:
+                    union.update(dict.fromkeys(row))
+                dict_writer = csv.DictWriter(f, list(union))
+                dict_writer.writeheader()
+                dict_writer.writerows(rows)
+        return filepath
+
+    return writer
+
+
 def _import_helper(
     dolt: DoltT,
     table: str,
-    write_import_file: Callable[[str], str],
+    write_import_file: Optional[Callable[[str], str]],
     import_mode: Optional[str] = None,
     primary_key: Optional[List[str]] = None,
     do_continue: Optional[bool] = False,
     commit: Optional[bool] = False,
     commit_message: Optional[str] = None,
     commit_date: Optional[datetime.datetime] = None,
+    known_tables: Optional[Set[str]] = None,
+    existing_path: Optional[str] = None,
 ) -> None:
-    import_mode = _get_import_mode_and_flags(dolt, table, import_mode)
+    import_mode = _get_import_mode_and_flags(dolt, table, import_mode, known_tables)
     logger.info(
         f"Importing to table {table} in dolt directory located in {dolt.repo_dir}, import mode {import_mode}"
     )
 
-    fname = tempfile.mktemp(suffix=".csv")
+    # a file the caller already has is imported as it is, only other data is written to a temporary file first
+    fname = None
     import_flags = IMPORT_MODES_TO_FLAGS[import_mode]
     try:
-        import_file = write_import_file(fname)
+        if existing_path is not None:
+            import_file = existing_path
+        else:
+            assert write_import_file is not None
+            # created here rather than just named, so no other process can take the name before it is written
+            with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as tf:
+                fname = tf.name
+            import_file = write_import_file(fname)
         args = ["table", "import", table] + import_flags
         if primary_key:
             args += ["--pk={}".format(",".join(primary_key))]
@@ -235,18 +402,27 @@ def _import_helper(
             dolt.add(table)
             dolt.commit(msg, date=commit_date)
     finally:
-        if os.path.exists(fname):
-            os.remove(fname)
+        if fname is not None:
+            try:
+                os.remove(fname)
+            except FileNotFoundError:
+                pass
 
 
 def _get_import_mode_and_flags(
-    dolt: DoltT, table: str, import_mode: Optional[str] = None
+    dolt: DoltT,
+    table: str,
+    import_mode: Optional[str] = None,
+    known_tables: Optional[Set[str]] = None,
 ) -> str:
-    import_modes = IMPORT_MODES_TO_FLAGS.keys()
-    if import_mode and import_mode not in import_modes:
-        raise ValueError(f"update_mode must be one of: {import_modes}")
+    if import_mode and import_mode not in _IMPORT_MODES:
+        raise ValueError(f"update_mode must be one of: {_IMPORT_MODES_STR}")
     elif not import_mode:
-        if table in [table.name for table in dolt.ls()]:
+        # the caller may already know which tables exist, sparing a listing per write
+        existing = (
+            known_tables if known_tables is not None else {table.name for table in dolt.ls()}
+        )
+        if table in existing:
             logger.info(f'No import mode specified, table exists, using "{UPDATE}"')
             import_mode = UPDATE
         else:
@@ -257,20 +433,33 @@ def _get_import_mode_and_flags(
 
 
 def columns_to_rows(columns: Dict[str, list]) -> List[dict]:
-    row_count = len(list(columns.values())[0])
-    rows: List[dict] = [{} for _ in range(row_count)]
-    for col_name in columns.keys():
-        for j, val in enumerate(columns[col_name]):
-            rows[j][col_name] = val
-
-    return rows
+    # zip transposes the columns into rows, each row dict is then built in one call
+    names = tuple(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
 
 
 def rows_to_columns(rows: Iterable[dict]) -> Dict[str, list]:
     columns: Dict[str, list] = defaultdict(list)
-    for i, row in enumerate(list(rows)):
+    if isinstance(rows, list) and rows:
+        # rows of a query result all have the same columns, so each column is read out in one pass by itemgetter
+        names = list(rows[0])
+        if all(len(row) == len(names) for row in rows):
+            try:
+                for name in names:
+                    columns[name] = list(map(itemgetter(name), rows))
+                return columns
+            except KeyError:
+                columns.clear()
+
+    # any other iterable is consumed once as it comes, rather than copied into a list first. dict.get does not go
+    # through defaultdict's __missing__, so a column's list is only created the first time it is seen
+    get_column = columns.get
+    for row in rows:
         for col, val in row.items():
-            columns[col].append(val)
+            column = get_column(col)
+            if column is None:
+                column = columns[col] = []
+            column.append(val)
 
     return columns
 
@@ -282,15 +471,16 @@ def to_list(value: Union[Any, List[Any]]) -> Any:
 @contextmanager
 def detach_head(db, commit):
     active_branch, _ = db._get_branches()
+    active_hash, active_name = active_branch.hash, active_branch.name
     switched = False
     try:
         commit_branches = db.sql(
-            f"select name, hash from dolt_branches where hash = '{commit}'",
+            f"select name, hash from dolt_branches where hash = {_sql_quote(commit)}",
             result_format="csv",
         )
-        if len(commit_branches) > 0:
+        if commit_branches:
             tmp_branch = commit_branches[0]
-            if active_branch.hash != tmp_branch["hash"]:
+            if active_hash != tmp_branch["hash"]:
                 switched = True
                 db.checkout(tmp_branch["name"])
         else:
@@ -300,5 +490,5 @@ def detach_head(db, commit):
         yield
     finally:
         if switched:
-            db.checkout(active_branch.name)
+            db.checkout(active_name)
         return
@@ -2,11 +2,13 @@ import csv
 import datetime
 import os
 import shutil
-from typing import Tuple
+import tempfile
+from typing import Optional, Tuple
 
 import pytest
 
 from doltcli import Dolt
+from tests.helpers import clear_log_cache
 
 TEST_TABLE = "characters"
 TEST_DATA_INITIAL = [
@@ -33,6 +35,52 @@ TEST_DATA_UPDATE = [
 TEST_DATA_FINAL = [TEST_DATA_INITIAL[0], TEST_DATA_INITIAL[2]] + TEST_DATA_UPDATE
 
 
+# tmpfs directory the session's temporary paths are created under, see pytest_configure
+_TMPFS = "/dev/shm"
+
+
+def _tmpfs() -> Optional[str]:
+    return _TMPFS if os.path.isdir(_TMPFS) and os.access(_TMPFS, os.W_OK) else None
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # the repositories the tests create are thrown away, so where there is a tmpfs they are put on it rather than on
+    # disk, which spares the fsyncs of every dolt commit. An explicit --basetemp is left alone, as is the one
+    # pytest-xdist gives each worker under the main process' own. This runs first so the tmpdir plugin reads the
+    # option after it is set
+    config._doltcli_tmp_dirs = []
+    tmpfs = _tmpfs()
+    if config.option.basetemp is None and tmpfs is not None:
+        config.option.basetemp = tempfile.mkdtemp(prefix="doltcli-", dir=tmpfs)
+        config._doltcli_tmp_dirs.append(config.option.basetemp)
+
+    # under pytest-xdist (`pytest tests -n auto`) the workers would share the user's global dolt config, which
+    # test_config_global rewrites, so each one works on its own copy of it
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker is not None:
+        root = tempfile.mkdtemp(prefix=f"doltcli-{worker}-", dir=tmpfs)
+        config._doltcli_tmp_dirs.append(root)
+        os.mkdir(os.path.join(root, ".dolt"))
+        home = os.environ.get("DOLT_ROOT_PATH") or os.path.expanduser("~")
+        global_config = os.path.join(home, ".dolt", "config_global.json")
+        if os.path.exists(global_config):
+            shutil.copy(global_config, os.path.join(root, ".dolt"))
+        os.environ["DOLT_ROOT_PATH"] = root
+
+
+def pytest_unconfigure(config):
+    # unlike pytest's own numbered directories nothing removes these later, and on tmpfs they take up memory
+    for path in getattr(config, "_doltcli_tmp_dirs", []):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_log_cache():
+    # repositories of earlier tests may have had the same paths, see cached_log
+    clear_log_cache()
+
+
 def get_repo_path_tmp_path(path: str, subpath: str = None) -> Tuple[str, str]:
     if subpath:
         return os.path.join(path, subpath), os.path.join(path, subpath, ".dolt")
@@ -64,23 +112,27 @@ def with_test_table(init_empty_test_repo):
     return dolt
 
 
+@pytest.fixture(scope="session")
+def shared_doltdb(tmp_path_factory):
+    # built once per session, tests that only read the repository share it, the others get a copy (see doltdb)
+    db_path = os.path.join(tmp_path_factory.mktemp("doltdb"), "foo")
+    db = Dolt.init(db_path)
+    db.sql("create table  t1 (a bigint primary key, b bigint, c bigint)")
+    db.sql("insert into t1 values (1,1,1), (2,2,2)")
+    db.add("t1")
+    db.commit("initialize t1")
+
+    db.sql("insert into t1 values (3,3,3)")
+    db.add("t1")
+    db.commit("initialize edit t1")
+    return db_path
+
+
 @pytest.fixture(scope="function")
-def doltdb():
-    db_path = os.path.join(os.path.dirname(__file__), "foo")
-    try:
-        db = Dolt.init(db_path)
-        db.sql("create table  t1 (a bigint primary key, b bigint, c bigint)")
-        db.sql("insert into t1 values (1,1,1), (2,2,2)")
-        db.add("t1")
-        db.commit("initialize t1")
-
-        db.sql("insert into t1 values (3,3,3)")
-        db.add("t1")
-        db.commit("initialize edit t1")
-        yield db_path
-    finally:
-        if os.path.exists(db_path):
-            shutil.rmtree(db_path)
+def doltdb(shared_doltdb, tmp_path):
+    db_path = os.path.join(tmp_path, "foo")
+    shutil.copytree(shared_doltdb, db_path)
+    return db_path
 
 
 @pytest.fixture()
@@ -103,26 +155,43 @@ def _test_data_to_file(file_path, file_name, test_data):
     return path
 
 
+@pytest.fixture(scope="session")
+def empty_repo_template(tmp_path_factory) -> Dolt:
+    # `dolt init` runs once per session, each test gets a copy of the repository it created
+    return Dolt.init(str(tmp_path_factory.mktemp("template")))
+
+
 @pytest.fixture
-def init_empty_test_repo(tmpdir) -> Dolt:
-    return _init_helper(tmpdir)
+def init_empty_test_repo(tmpdir, empty_repo_template) -> Dolt:
+    return _init_helper(tmpdir, template=empty_repo_template)
 
 
 @pytest.fixture
-def init_other_empty_test_repo(tmpdir) -> Dolt:
-    return _init_helper(tmpdir, "other")
+def init_other_empty_test_repo(tmpdir, empty_repo_template) -> Dolt:
+    return _init_helper(tmpdir, "other", template=empty_repo_template)
 
 @pytest.fixture
 def tmpdir2(tmpdir):
     return tmpdir.mkdir("tmpdir2")
 
 @pytest.fixture
-def empty_test_repo_with_remote(tmpdir, tmpdir2) -> Dolt:
-    repo = _init_helper(tmpdir)
+def empty_test_repo_with_remote(tmpdir, tmpdir2, empty_repo_template) -> Dolt:
+    repo = _init_helper(tmpdir, template=empty_repo_template)
     repo.remote(add=True, name="origin", url=rf"file:///{tmpdir2}")
     return repo
 
 
-def _init_helper(path: str, ext: str = None):
+
+@pytest.fixture
+def stub_repo(tmp_path) -> Dolt:
+    # a repository directory dolt was never run in, for tests that replace how the instance runs dolt
+    os.mkdir(os.path.join(tmp_path, ".dolt"))
+    return Dolt(str(tmp_path))
+
+def _init_helper(path: str, ext: str = None, template: Dolt = None):
     repo_path, repo_data_dir = get_repo_path_tmp_path(path, ext)
-    return Dolt.init(repo_path)
+    if template is None:
+        return Dolt.init(repo_path)
+    os.makedirs(repo_path, exist_ok=True)
+    shutil.copytree(os.path.join(template.repo_dir, ".dolt"), repo_data_dir)
+    return Dolt(str(repo_path))
@@ -1,5 +1,8 @@
 import csv
-from typing import List
+import os
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Dict, List, Tuple
 
 
 def write_dict_to_csv(data, file):
@@ -7,8 +10,7 @@ def write_dict_to_csv(data, file):
     with open(file, "w") as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
         writer.writeheader()
-        for row in data:
-            writer.writerow(row)
+        writer.writerows(data)
 
 
 def read_csv_to_dict(file):
@@ -23,14 +25,54 @@ def compare_rows_helper(expected: List[dict], actual: List[dict]):
     ), f"Unequal row counts: {len(expected)} != {len(actual)}"
     errors = []
     for k in expected[0].keys():
+        # each column is read out by itemgetter in one pass, only dates need a per-value slice
+        get = itemgetter(k)
         if k.startswith("date"):
-            exp = set([e[k][:10] for e in expected])
-            act = set([a[k][:10] for a in actual])
+            exp = {value[:10] for value in map(get, expected)}
+            act = {value[:10] for value in map(get, actual)}
         else:
-            exp = set([e[k] for e in expected])
-            act = set([a[k] for a in actual])
-        if exp ^ act != set():
+            exp = set(map(get, expected))
+            act = set(map(get, actual))
+        if exp != act:
             errors.append(f"Unequal value sets: {exp}, {act}")
 
     error_str = "\n".join(errors)
     assert not errors, f"Failed with the following unequal columns:\n{error_str}"
+
+
+def commit_sql(repo, table: str, message: str, *statements: str):
+    """
+    Runs the statements, stages the table and commits it with the message, all in a single `dolt sql` call rather than
+    a `dolt` process for each step.
+    """
+    escaped = message.replace("'", "''")
+    statements += (f"CALL DOLT_ADD('{table}')", f"CALL DOLT_COMMIT('-m', '{escaped}')")
+    repo.sql(query=";\n".join(statements))
+    clear_log_cache()
+
+
+# (repository directory, log arguments) -> log, see cached_log
+_log_cache: Dict[Tuple[str, tuple], "OrderedDict"] = {}
+
+
+def cached_log(repo, **kwargs) -> "OrderedDict":
+    """
+    `repo.log(**kwargs)`, read once per repository and arguments for assertions that only read the log. The cache is
+    cleared before each test and by `commit_sql`, call `clear_log_cache` after changing the repository any other way.
+    """
+    key = (os.path.abspath(repo.repo_dir), tuple(sorted(kwargs.items())))
+    log = _log_cache.get(key)
+    if log is None:
+        log = _log_cache[key] = repo.log(**kwargs)
+    return OrderedDict(log)
+
+
+def clear_log_cache():
+    _log_cache.clear()
+
+
+def log_commits(repo, **kwargs) -> list:
+    """
+    The commits `repo.log(**kwargs)` returns, newest first, see `cached_log`.
+    """
+    return list(cached_log(repo, **kwargs).values())
@@ -1,26 +1,47 @@
 import csv
 import os
 import shutil
+import subprocess
+import sys
 import tempfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 import pytest
 
+import doltcli.dolt as dolt_module
 from doltcli import (
     CREATE,
     UPDATE,
+    Branch,
+    BranchBatch,
+    BranchTable,
+    Commit,
+    CommitTable,
     Dolt,
     DoltException,
     _execute,
+    clone_many,
     detach_head,
+    fetch_many,
     read_rows,
+    read_tuples_sql,
     set_dolt_path,
     write_rows,
 )
-from tests.helpers import compare_rows_helper, read_csv_to_dict
+from doltcli.dolt import _is_read_only, _load_data_statement
+from tests.helpers import commit_sql, compare_rows_helper, log_commits, read_csv_to_dict
 
 BASE_TEST_ROWS = [{"name": "Rafael", "id": "1"}, {"name": "Novak", "id": "2"}]
+# BASE_TEST_ROWS as every result is compared with it, see _verify_against_base_rows
+BASE_TEST_ROWS_STR = [{k: str(v) for k, v in row.items()} for row in BASE_TEST_ROWS]
+
+# rows the tests add to test_players, see create_test_table
+INSERT_STAN = 'INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)'
+INSERT_MARIN = 'INSERT INTO `test_players` (`name`, `id`) VALUES ("Marin", 4)'
+INSERT_JUAN_MARTIN = 'INSERT INTO `test_players` (`name`, `id`) VALUES ("Juan Martin", 5)'
 
 
 def get_repo_path_tmp_path(path: str, subpath: str = None) -> Tuple[str, str]:
@@ -36,8 +57,7 @@ def create_test_data(tmp_path) -> str:
     with open(path, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow(list(BASE_TEST_ROWS[0].keys()))
-        for row in BASE_TEST_ROWS:
-            writer.writerow(list(row.values()))
+        writer.writerows(row.values() for row in BASE_TEST_ROWS)
     yield path
     os.remove(path)
 
@@ -90,7 +110,7 @@ def test_repo_with_two_remote_branches(
 
     # checkout new branch and add a player
     repo.checkout(new_branch_name, checkout_branch=True)
-    repo.sql(f'INSERT INTO `{table_name}` (`name`, `id`) VALUES ("Juan Martin", 5)')
+    repo.sql(INSERT_JUAN_MARTIN)
     repo.add(table_name)
     repo.commit(commit_message_new_branch)
 
@@ -131,6 +151,20 @@ def test_bad_repo_path(tmp_path):
         Dolt(bad_repo_path)
 
 
+def test_clear_caches(tmp_path):
+    repo = Dolt.init(str(tmp_path))
+    assert Dolt.version() == Dolt.version()
+    Dolt.config_global(list=True)
+    assert dolt_module._version.cache_info().currsize == 1
+    Dolt.clear_caches()
+    assert dolt_module._version.cache_info().currsize == 0
+    assert Dolt._config_cache == {}
+    assert Dolt.version() == Dolt.version()
+    shutil.rmtree(os.path.join(repo.repo_dir, ".dolt"))
+    with pytest.raises(ValueError):
+        Dolt(repo.repo_dir)
+
+
 def test_commit(create_test_table: Tuple[Dolt, str]):
     repo, test_table = create_test_table
     repo.add(test_table)
@@ -141,12 +175,12 @@ def test_commit(create_test_table: Tuple[Dolt, str]):
 
 def test_head(create_test_table: Tuple[Dolt, str]):
     repo, test_table = create_test_table
-    assert list(repo.log().values())[0].ref == repo.head
+    assert log_commits(repo)[0].ref == repo.head
 
 
 @pytest.mark.xfail(reason="Dolt cli bug with --result-format")
-def test_working(doltdb):
-    db = Dolt(doltdb)
+def test_working(shared_doltdb):
+    db = Dolt(shared_doltdb)
     assert db.head != db.working
 
 
@@ -170,15 +204,13 @@ def test_merge_fast_forward(create_test_table: Tuple[Dolt, str]):
 
     # create a non-trivial commit against `other`
     repo.checkout("other")
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Juan Martin", 5)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_JUAN_MARTIN)
 
     # merge
     repo.checkout("main")
     repo.merge("other", message_merge)
 
-    commits = list(repo.log().values())
+    commits = log_commits(repo)
     fast_forward_commit = commits[0]
     parent = commits[1]
 
@@ -202,22 +234,18 @@ def test_merge_conflict(create_test_table: Tuple[Dolt, str]):
     repo.branch("other")
 
     # create a non-trivial commit against `main`
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
 
     # create a non-trivial commit against `other`
     repo.checkout("other")
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Marin", 4)')
-    repo.add(test_table)
-    repo.commit(message_three)
+    commit_sql(repo, test_table, message_three, INSERT_MARIN)
 
     # merge
     repo.checkout("main")
     with pytest.raises(DoltException):
         repo.merge("other", message_merge)
 
-    # commits = list(repo.log().values())
+    # commits = log_commits(repo)
     # head_of_main = commits[0]
 
     # assert head_of_main.message == message_two
@@ -229,10 +257,8 @@ def test_dolt_log(create_test_table: Tuple[Dolt, str]):
     message_two = "Added Stan the Man"
     repo.add(test_table)
     repo.commit(message_one)
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
-    commits = list(repo.log().values())
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
+    commits = log_commits(repo)
     current_commit = commits[0]
     previous_commit = commits[1]
     assert current_commit.message == message_two
@@ -246,11 +272,9 @@ def test_dolt_log_scope(create_test_table: Tuple[Dolt, str]):
     repo.add(test_table)
     repo.commit(message_one)
     repo.checkout("tmp_br", checkout_branch=True)
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
     repo.checkout("main")
-    commits = list(repo.log().values())
+    commits = log_commits(repo)
     current_commit = commits[0]
     previous_commit = commits[1]
     assert current_commit.message == message_one
@@ -262,11 +286,9 @@ def test_dolt_log_number(create_test_table: Tuple[Dolt, str]):
     message_two = "Added Stan the Man"
     repo.add(test_table)
     repo.commit(message_one)
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
 
-    commits = list(repo.log(number=1).values())
+    commits = log_commits(repo, number=1)
 
     assert len(commits) == 1
     current_commit = commits[0]
@@ -284,12 +306,10 @@ def test_dolt_log_commit(create_test_table: Tuple[Dolt, str]):
     message_two = "Added Stan the Man"
     repo.add(test_table)
     repo.commit(message_one)
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
 
-    commits = list(repo.log(number=1).values())
-    commits = list(repo.log(commit=commits[0].ref).values())
+    commits = log_commits(repo, number=1)
+    commits = log_commits(repo, commit=commits[0].ref)
 
     assert len(commits) == 1
     current_commit = commits[0]
@@ -311,21 +331,17 @@ def test_dolt_log_merge_commit(create_test_table: Tuple[Dolt, str]):
     repo.branch("other")
 
     # create a non-trivial commit against `main`
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Stan", 4)')
-    repo.add(test_table)
-    repo.commit(message_two)
+    commit_sql(repo, test_table, message_two, INSERT_STAN)
 
     # create a non-trivial commit against `other`
     repo.checkout("other")
-    repo.sql('INSERT INTO `test_players` (`name`, `id`) VALUES ("Juan Martin", 5)')
-    repo.add(test_table)
-    repo.commit(message_three)
+    commit_sql(repo, test_table, message_three, INSERT_JUAN_MARTIN)
 
     # merge
     repo.checkout("main")
     repo.merge("other", message_merge)
 
-    commits = list(repo.log().values())
+    commits = log_commits(repo)
     merge_commit = commits[0]
     first_merge_parent = commits[1]
     second_merge_parent = commits[2]
@@ -404,6 +420,32 @@ def test_checkout_with_tables(create_test_table: Tuple[Dolt, str]):
     assert repo.status().is_clean
 
 
+def test_checkout_with_multiple_tables(create_test_table: Tuple[Dolt, str]):
+    repo, test_table = create_test_table
+    repo.add(test_table)
+    repo.commit("Added test table")
+    repo.sql("CREATE TABLE `other_players` (`id` BIGINT NOT NULL, PRIMARY KEY (`id`))")
+    repo.add("other_players")
+    repo.commit("Added other table")
+    repo.sql(INSERT_JUAN_MARTIN)
+    repo.sql("INSERT INTO `other_players` (`id`) VALUES (1)")
+    repo.checkout(tables=[test_table, "other_players"])
+    assert repo.status().is_clean
+
+
+def test_diff_schema(create_test_table: Tuple[Dolt, str], monkeypatch):
+    repo, test_table = create_test_table
+    calls = []
+
+    def execute(args, cwd, **kwargs):
+        calls.append(args)
+        return ""
+
+    monkeypatch.setattr(dolt_module, "_execute", execute)
+    repo.diff(schema=True, tables=[test_table])
+    assert calls == [["diff", "--schema", test_table]]
+
+
 def test_branch(create_test_table: Tuple[Dolt, str]):
     repo, _ = create_test_table
     active_branch, branches = repo.branch()
@@ -442,6 +484,160 @@ def test_branch_move(create_test_table: Tuple[Dolt, str]):
     _verify_branches(repo, ["dosac"])
 
 
+def test_branch_listing_invalidated(create_test_table: Tuple[Dolt, str]):
+    repo, _ = create_test_table
+    _verify_branches(repo, ["main"])
+    _verify_branches(repo, ["main"])
+    repo.branch("dosac")
+    _verify_branches(repo, ["main", "dosac"])
+
+
+def test_branch_mutation_returns_tuple(stub_repo, monkeypatch):
+    repo = stub_repo
+    calls = []
+
+    def execute(args, **kwargs):
+        calls.append((args, kwargs))
+        return ""
+
+    monkeypatch.setattr(repo, "execute", execute)
+    monkeypatch.setattr(repo, "_get_branches", lambda: ("main", ["main", "dosac"]))
+    result = repo.branch("dosac", capture=True)
+    assert isinstance(result, tuple) and result == ("main", ["main", "dosac"])
+    assert calls == [(["branch", "dosac"], {"capture": True})]
+    repo.branch("dosac", delete=True)
+    assert calls[-1] == (["branch", "--delete", "dosac"], {"capture": False})
+
+
+def test_branch_table():
+    table = BranchTable(
+        [
+            ("main", "h1", "a", "a@b.c", "2021-01-01", "init", "", ""),
+            ("origin/main", "h2", "a", "a@b.c", "2021-01-01", "init"),
+        ]
+    )
+    assert table.names == ("main", "origin/main")
+    assert table.hashes == ("h1", "h2")
+    assert len(table) == 2
+    assert table[1] == Branch("origin/main", "h2", "a", "a@b.c", "2021-01-01", "init")
+    assert [branch.name for branch in table[:1]] == ["main"]
+    assert list(table) == table
+    assert len(BranchTable([])) == 0 and BranchTable([]).names == ()
+    shared = BranchTable([("a", "".join(["h", "1"])), ("b", "".join(["h", "1"]))])
+    assert shared.hashes[0] is shared.hashes[1]
+    shared[0].latest_committer = "mutated"
+    assert shared[0].latest_committer is None
+    assert BranchTable([("a", "h1")])[0].latest_committer is None
+
+
+def test_branches_listed_by_column_name(stub_repo, monkeypatch):
+    repo = stub_repo
+    queries = []
+    # an older dolt with no remote and branch columns, and a column Branch does not have
+    local_columns = ["name", "hash", "dirty", "latest_commit_message", "active_branch()"]
+    local_rows = [
+        ("main", "h1", "false", "init", "main"),
+        ("dosac", "h1", "true", "init", "main"),
+    ]
+    remote_columns = ["name", "hash", "latest_commit_message"]
+    remote_rows = [("origin/main", "h1", "init")]
+
+    def read_columns_and_tuples(query):
+        queries.append(query)
+        if "dolt_remote_branches" in query:
+            return remote_columns, remote_rows
+        if "where" in query:
+            return local_columns, local_rows[:1]
+        return local_columns, local_rows
+
+    monkeypatch.setattr(repo, "_read_columns_and_tuples", read_columns_and_tuples)
+    active_branch, branches = repo.branch(all=True)
+    assert active_branch.name == "main" and active_branch.latest_commit_message == "init"
+    assert [branch.name for branch in branches] == ["main", "dosac", "origin/main"]
+    assert branches[0].remote is None and branches[2].latest_committer is None
+    _, branches = repo.branch()
+    assert [branch.name for branch in branches] == ["main", "dosac"]
+    repo._branches_cache.clear()
+    _, branches = repo.branch(remote=True)
+    assert [branch.name for branch in branches] == ["origin/main"]
+    assert len(queries) == 5
+    assert all(query.startswith("select *") for query in queries)
+
+
+def test_get_branches(create_test_table: Tuple[Dolt, str]):
+    repo, _ = create_test_table
+    repo.branch("dosac")
+    repo.branch("it's")
+    assert set(repo.get_branches(["it's", "main", "missing"]).names) == {"it's", "main"}
+    assert repo.get_branches([]) == []
+    assert set(repo.get_branches().names) == {"dosac", "it's", "main"}
+
+
+def test_branch_batch(create_test_table: Tuple[Dolt, str]):
+    repo, _ = create_test_table
+    with repo.branch_batch() as batch:
+        batch.create("dosac")
+        batch.copy("main", "abbot")
+        batch.move("dosac", "murray")
+    _, branches = batch.result
+    assert set(branch.name for branch in branches) == {"main", "abbot", "murray"}
+
+
+def test_branch_async(create_test_table: Tuple[Dolt, str]):
+    repo, _ = create_test_table
+    futures = [repo.branch_async(name) for name in ["dosac", "abbot", "murray"]]
+    for future in futures:
+        future.result()
+    _verify_branches(repo, ["main", "dosac", "abbot", "murray"])
+
+
+def test_submit_failure_is_per_statement(stub_repo, monkeypatch):
+    repo = stub_repo
+    queries = []
+
+    def execute(args, **kwargs):
+        if "bad" in args[2]:
+            raise DoltException(args[2])
+        queries.append(args[2])
+
+    monkeypatch.setattr(repo, "execute", execute)
+    statements = [
+        "insert into t values (1)",
+        "insert into bad values (2)",
+        "insert into t values (3)",
+    ]
+    futures = [repo.submit(statement) for statement in statements]
+    repo.close()
+    assert queries == [statements[0], statements[2]]
+    assert futures[0].result() is None and futures[2].result() is None
+    with pytest.raises(DoltException):
+        futures[1].result()
+
+
+def test_branch_batch_sql():
+    batch = BranchBatch()
+    batch.create("it's", start_point="main", force=True)
+    batch.delete("dosac")
+    assert batch.to_sql() == (
+        "CALL DOLT_BRANCH('--force', 'it''s', 'main'); CALL DOLT_BRANCH('--delete', 'dosac');"
+    )
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [
+        (["status"], True),
+        (["branch", "dosac"], False),
+        (["sql", "--query", "select * from dolt_branches", "--result-format", "csv"], True),
+        (["sql", "--query", "SELECT DOLT_CHECKOUT('dosac')"], False),
+        (["sql", "--query", "select 1; insert into t values (1)"], False),
+        (["sql", "--query", "insert into t values (1)"], False),
+    ],
+)
+def test_is_read_only(args, expected):
+    assert _is_read_only(args) == expected
+
+
 def _verify_branches(repo: Dolt, branch_list: List[str]):
     _, branches = repo.branch()
     assert set(branch.name for branch in branches) == set(branch for branch in branch_list)
@@ -463,7 +659,7 @@ def test_pull_from_main(test_repo_with_two_remote_branches):
 
     # pull remote
     repo.pull("origin")
-    commit_message_to_check = list(repo.log().values())[0].message
+    commit_message_to_check = log_commits(repo)[0].message
 
     # verify that the commit message is the same as the one in main
     assert commit_message_to_check == commit_message_main
@@ -479,12 +675,21 @@ def test_pull_from_branch(test_repo_with_two_remote_branches):
 
     # pull remote new_branch into current branch
     repo.pull("origin", new_branch_name)
-    commit_message_to_check = list(repo.log().values())[0].message
+    commit_message_to_check = log_commits(repo)[0].message
 
     # verify that the commit message is the same as the one we pushed to new_branch
     assert commit_message_to_check == commit_message_new_branch
 
 
+def test_fetch_and_clone_many(test_repo_with_two_remote_branches, tmp_path):
+    repo, __, commit_message_main, __ = test_repo_with_two_remote_branches
+    fetch_many([repo], jobs=2)
+
+    [remote] = repo.remote()
+    [clone] = clone_many([remote.url], new_dir=str(tmp_path), jobs=2)
+    assert log_commits(clone)[0].message == commit_message_main
+
+
 def test_get_branches_local(test_repo_with_two_remote_branches):
     (
         repo,
@@ -530,8 +735,8 @@ def test_get_branches_all(test_repo_with_two_remote_branches):
     assert all[2].name == f"remotes/origin/{new_branch_name}"
 
 
-def test_checkout_non_existent_branch(doltdb):
-    repo = Dolt(doltdb)
+def test_checkout_non_existent_branch(shared_doltdb):
+    repo = Dolt(shared_doltdb)
     repo.checkout("main")
 
 
@@ -545,6 +750,15 @@ def test_ls_empty(init_empty_test_repo: Dolt):
     assert len(repo.ls()) == 0
 
 
+def test_table_rm(init_empty_test_repo: Dolt):
+    repo = init_empty_test_repo
+    repo.sql(
+        "create table a (id int primary key); create table b (id int primary key);", batch=True
+    )
+    repo.table_rm(["a", "b"])
+    assert repo.ls() == []
+
+
 def test_sql(create_test_table: Tuple[Dolt, str]):
     repo, test_table = create_test_table
     sql = """
@@ -572,16 +786,128 @@ def test_sql_csv(create_test_table: Tuple[Dolt, str]):
 
 
 def _verify_against_base_rows(result: List[dict]):
-    assert len(result) == len(BASE_TEST_ROWS)
-
+    # Unfortunately csv.DictReader is a stream reader and thus does not look at all values for a given column
+    # and make type inference, so we have to cast everything to a string. JSON round-trips, but would not
+    # preserve datetime objects for example.
     result_sorted = sorted(result, key=lambda el: el["id"])
-    for left, right in zip(BASE_TEST_ROWS, result_sorted):
-        assert set(left.keys()) == set(right.keys())
-        for k in left.keys():
-            # Unfortunately csv.DictReader is a stream reader and thus does not look at all values for a given column
-            # and make type inference, so we have to cast everything to a string. JSON round-trips, but would not
-            # preserve datetime objects for example.
-            assert str(left[k]) == str(right[k])
+    assert [{k: str(v) for k, v in row.items()} for row in result_sorted] == BASE_TEST_ROWS_STR
+
+
+def test_sql_server(create_test_table: Tuple[Dolt, str]):
+    pytest.importorskip("pymysql")
+    repo, test_table = create_test_table
+    with Dolt(repo.repo_dir, use_sql_server=True) as db:
+        result = db.sql(query=f"SELECT * FROM `{test_table}`", result_format="csv")
+        _verify_against_base_rows(result)
+        query = f"SELECT name, id FROM `{test_table}` ORDER BY id"
+        assert read_tuples_sql(db, query) == [
+            (row["name"], row["id"]) for row in BASE_TEST_ROWS
+        ]
+        db.branch("dosac")
+        _verify_branches(db, ["main", "dosac"])
+        assert [(t.name, t.row_cnt) for t in db.ls()] == [(test_table, len(BASE_TEST_ROWS))]
+        assert db.remote() == []
+        assert db.status() == repo.status()
+    assert db._server is None
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        dolt_module.DoltServerNotRunningException("dolt sql-server failed to start"),
+        ImportError("use_sql_server requires pymysql"),
+    ],
+)
+def test_sql_server_fallback(create_test_table: Tuple[Dolt, str], monkeypatch, error):
+    repo, test_table = create_test_table
+
+    def fail(repo_dir, database):
+        raise error
+
+    monkeypatch.setattr(dolt_module, "_DoltSqlServer", fail)
+    with Dolt(repo.repo_dir, use_sql_server=True) as db:
+        assert [t.name for t in db.ls()] == [test_table]
+        assert not db._use_sql_server
+
+
+def test_sql_server_duplicate_columns(create_test_table: Tuple[Dolt, str]):
+    pytest.importorskip("pymysql")
+    repo, test_table = create_test_table
+    query = f"SELECT a.id, b.id FROM `{test_table}` AS a JOIN `{test_table}` AS b ON b.id = a.id + 1"
+    with Dolt(repo.repo_dir, use_sql_server=True) as db:
+        assert read_tuples_sql(db, query) == [("1", "2")]
+        assert list(db.sql_iter(query)) == [("1", "2")]
+
+
+def test_sql_server_started_once(init_empty_test_repo: Dolt, monkeypatch):
+    started = []
+
+    class FakeServer:
+        def __init__(self, repo_dir, database):
+            started.append(database)
+            time.sleep(0.05)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(dolt_module, "_DoltSqlServer", FakeServer)
+    with Dolt(init_empty_test_repo.repo_dir, use_sql_server=True) as db:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            servers = list(pool.map(lambda _: db._sql_server, range(4)))
+    assert len(started) == 1
+    assert all(server is servers[0] for server in servers)
+
+
+def test_sql_server_stopped_for_cli_writes(init_empty_test_repo: Dolt, monkeypatch):
+    stopped = []
+
+    class FakeServer:
+        def __init__(self, repo_dir, database):
+            pass
+
+        def close(self):
+            stopped.append(self)
+
+    monkeypatch.setattr(dolt_module, "_DoltSqlServer", FakeServer)
+    monkeypatch.setattr(dolt_module, "_execute", lambda args, cwd, **kwargs: "")
+    with Dolt(init_empty_test_repo.repo_dir, use_sql_server=True) as db:
+        server = db._sql_server
+        db.execute(["log"])
+        assert db._server is server and not stopped
+        db.checkout("main")
+        assert db._server is None and stopped == [server]
+
+
+def test_sql_server_checkout(create_test_table: Tuple[Dolt, str]):
+    pytest.importorskip("pymysql")
+    repo, test_table = create_test_table
+    repo.add(test_table)
+    repo.commit("Base branch")
+    repo.branch("other")
+    with Dolt(repo.repo_dir, use_sql_server=True) as db:
+        db.checkout("other")
+        assert db.active_branch == "other"
+        db.sql(INSERT_JUAN_MARTIN)
+        assert read_tuples_sql(db, f"SELECT count(*) FROM `{test_table}`") == [("3",)]
+        db.checkout("main")
+        assert db.active_branch == "main"
+        assert read_tuples_sql(db, f"SELECT count(*) FROM `{test_table}`") == [("2",)]
+
+
+def test_sql_server_merge(create_test_table: Tuple[Dolt, str]):
+    pytest.importorskip("pymysql")
+    repo, test_table = create_test_table
+    repo.add(test_table)
+    repo.commit("Base branch")
+    repo.branch("other")
+    with Dolt(repo.repo_dir, use_sql_server=True) as db:
+        db.checkout("other")
+        commit_sql(db, test_table, "Other branch", INSERT_JUAN_MARTIN)
+        db.checkout("main")
+        db.merge("other", "merge")
+        assert db.active_branch == "main"
+        assert log_commits(db)[0].message == "Other branch"
+        assert read_tuples_sql(db, f"SELECT count(*) FROM `{test_table}`") == [("3",)]
 
 
 TEST_IMPORT_FILE_DATA = """
@@ -602,6 +928,84 @@ def test_schema_import_create(init_empty_test_repo: Dolt, tmp_path):
     assert repo.status().added_tables == {table: False}
 
 
+def test_table_import_many(init_empty_test_repo: Dolt, tmp_path):
+    repo = init_empty_test_repo
+    repo.sql(
+        "create table a (name text, id int primary key); create table b (id int primary key, name text);"
+    )
+    test_file = tmp_path / "test_data.csv"
+    with open(test_file, "w") as f:
+        f.writelines(TEST_IMPORT_FILE_DATA)
+    imports = [
+        dict(table=table, filename=str(test_file), update_table=True) for table in ["a", "b"]
+    ]
+    repo.table_import_many(imports)
+
+    for table in ["a", "b"]:
+        rows = read_rows(repo, table)
+        assert sorted((row["name"], row["id"]) for row in rows) == [
+            ("rafa", "2"),
+            ("roger", "1"),
+        ]
+
+
+def test_table_import_many_crlf(init_empty_test_repo: Dolt, tmp_path):
+    repo = init_empty_test_repo
+    repo.sql("create table a (name text, id int primary key);")
+    test_file = tmp_path / "test_data.csv"
+    with open(test_file, "w", newline="") as f:
+        f.write(TEST_IMPORT_FILE_DATA.replace("\n", "\r\n"))
+    repo.table_import_many([dict(table="a", filename=str(test_file), update_table=True)])
+
+    rows = read_rows(repo, "a")
+    assert sorted((row["name"], row["id"]) for row in rows) == [("rafa", "2"), ("roger", "1")]
+
+
+def test_table_import_many_empty_fields(init_empty_test_repo: Dolt, tmp_path):
+    repo = init_empty_test_repo
+    repo.sql("create table a (name text, id int primary key, rank int);")
+    test_file = tmp_path / "test_data.csv"
+    with open(test_file, "w") as f:
+        f.write("name,id,rank\nroger,1,\n,2,3\n")
+    repo.table_import_many([dict(table="a", filename=str(test_file), update_table=True)])
+
+    rows = read_tuples_sql(
+        repo, "select id, coalesce(name, 'null'), coalesce(`rank`, -1) from a order by id"
+    )
+    assert rows == [("1", "roger", "-1"), ("2", "null", "3")]
+
+
+def test_table_import_many_partial_header(init_empty_test_repo: Dolt, tmp_path):
+    repo = init_empty_test_repo
+    repo.sql(
+        "create table a (name text, id int primary key, rank int); insert into a values ('roger', 1, 3);"
+    )
+    test_file = tmp_path / "test_data.csv"
+    with open(test_file, "w") as f:
+        f.writelines(TEST_IMPORT_FILE_DATA)
+    repo.table_import_many([dict(table="a", filename=str(test_file), update_table=True)])
+
+    rows = read_tuples_sql(repo, "select name, id, `rank` from a order by id")
+    assert rows == [("roger", "1", "3"), ("rafa", "2", "")]
+
+
+def test_load_data_statement(tmp_path):
+    test_file = tmp_path / "test_data.csv"
+    columns = {"name", "id"}
+    with open(test_file, "w", newline="") as f:
+        f.write(TEST_IMPORT_FILE_DATA.replace("\n", "\r\n"))
+    assert "LINES TERMINATED BY '\\r\\n'" in _load_data_statement(
+        "a", str(test_file), ",", columns
+    )
+    assert _load_data_statement("a", str(test_file), ",", {"name", "id", "rank"}) is None
+    with open(test_file, "w", newline="") as f:
+        f.write("name,id\nroger,1\r\n")
+    assert _load_data_statement("a", str(test_file), ",", columns) is None
+    with open(test_file, "w") as f:
+        f.write("name,id\n,1\n")
+    assert _load_data_statement("a", str(test_file), ",", columns) is None
+
+
 def test_config_global(init_empty_test_repo: Dolt):
     _ = init_empty_test_repo
     current_global_config = Dolt.config_global(list=True)
@@ -626,6 +1030,8 @@ def test_config_local(init_empty_test_repo: Dolt):
     local_config = repo.config_local(list=True)
     global_config = Dolt.config_global(list=True)
     assert local_config["user.name"] == test_username and local_config["user.email"] == test_email
+    assert repo.config_local(get=True, name="user.name") == {"user.name": test_username}
+    assert repo.config_local(get=True, name="user.missing") == {}
     assert global_config["user.name"] == current_global_config["user.name"]
     assert global_config["user.email"] == current_global_config["user.email"]
 
@@ -656,6 +1062,11 @@ def test_get_clone_dir_remote_only(tmp_path):
     assert new_dir == res
 
 
+def test_get_clone_dir_remote_trailing_slash(tmp_path):
+    res = Dolt._get_clone_dir(remote_url="some/remote/")
+    assert os.path.join(os.getcwd(), "remote") == res
+
+
 def test_get_clone_dir_new_dir_only(tmp_path):
     res = Dolt._get_clone_dir("new_dir")
     assert "new_dir" == res
@@ -674,16 +1085,22 @@ def test_clone_new_dir(tmp_path):
     assert db.head is not None
 
 
-def test_dolt_sql_csv(init_empty_test_repo: Dolt):
-    dolt = init_empty_test_repo
+@pytest.fixture(scope="session")
+def shared_sql_repo(tmp_path_factory) -> Dolt:
+    # the tests of dolt sql's output formats only read test_table, so they share one repository with it committed
+    dolt = Dolt.init(str(tmp_path_factory.mktemp("sql") / "repo"))
     write_rows(dolt, "test_table", BASE_TEST_ROWS, commit=True)
+    return dolt
+
+
+def test_dolt_sql_csv(shared_sql_repo: Dolt):
+    dolt = shared_sql_repo
     result = dolt.sql("SELECT `name` as name, `id` as id FROM test_table ORDER BY id", result_format="csv")
     compare_rows_helper(BASE_TEST_ROWS, result)
 
 
-def test_dolt_sql_json(init_empty_test_repo: Dolt):
-    dolt = init_empty_test_repo
-    write_rows(dolt, "test_table", BASE_TEST_ROWS, commit=True)
+def test_dolt_sql_json(shared_sql_repo: Dolt):
+    dolt = shared_sql_repo
     result = dolt.sql("SELECT `name` as name, `id` as id FROM test_table ", result_format="json")
     # JSON return value preserves some type information, we cast back to a string
     for row in result["rows"]:
@@ -691,18 +1108,27 @@ def test_dolt_sql_json(init_empty_test_repo: Dolt):
     compare_rows_helper(BASE_TEST_ROWS, result["rows"])
 
 
-def test_dolt_sql_file(init_empty_test_repo: Dolt):
-    dolt = init_empty_test_repo
+def test_dolt_sql_file(shared_sql_repo: Dolt):
+    dolt = shared_sql_repo
 
     with tempfile.NamedTemporaryFile() as f:
-        write_rows(dolt, "test_table", BASE_TEST_ROWS, commit=True)
         result = dolt.sql("SELECT `name` as name, `id` as id FROM test_table ", result_file=f.name)
         res = read_csv_to_dict(f.name)
         compare_rows_helper(BASE_TEST_ROWS, res)
 
 
-def test_dolt_sql_errors(doltdb):
-    db = Dolt(doltdb)
+def test_dolt_sql_result_parser_reuses_file(shared_doltdb):
+    db = Dolt(shared_doltdb)
+    first = db.sql("select 1 as a", result_parser=lambda f: f)
+    second = db.sql("select 2 as a", result_parser=read_csv_to_dict)
+    assert second == [{"a": "2"}]
+    assert os.path.dirname(first) == db._tmpdir
+    db.close()
+    assert not os.path.exists(first)
+
+
+def test_dolt_sql_errors(shared_doltdb):
+    db = Dolt(shared_doltdb)
 
     with pytest.raises(ValueError):
         db.sql(result_parser=lambda x: x, query=None)
@@ -714,14 +1140,20 @@ def test_dolt_sql_errors(doltdb):
         db.sql(result_format="csv", query=None)
 
 
-def test_no_init_error(init_empty_test_repo: Dolt):
+def _execute_fails(args, cwd, outfile=None, capture=True):
+    # stands in for dolt in tests of how a failing command is handled, which is all Python
+    raise DoltException(args, "", "error", 1)
+
+
+def test_no_init_error(init_empty_test_repo: Dolt, monkeypatch):
     dolt = init_empty_test_repo
+    monkeypatch.setattr(dolt_module, "_execute", _execute_fails)
 
     dolt.init(dolt.repo_dir, error=False)
 
 
-def test_set_dolt_path_error(doltdb):
-    db = Dolt(doltdb)
+def test_set_dolt_path_error(shared_doltdb):
+    db = Dolt(shared_doltdb)
     set_dolt_path("dolt")
     test_cmd = "show tables"
     db.sql(test_cmd, result_format="csv")
@@ -736,37 +1168,156 @@ def test_set_dolt_path_error(doltdb):
         set_dolt_path("dolt")
 
 
-def test_no_checkout_error(init_empty_test_repo: Dolt):
+def test_no_checkout_error(init_empty_test_repo: Dolt, monkeypatch):
     dolt = init_empty_test_repo
+    monkeypatch.setattr(dolt_module, "_execute", _execute_fails)
 
     dolt.checkout(branch="main", error=False)
 
 
-def test_reset(doltdb):
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"hard": True},
+        {"soft": True},
+        {"tables": "t1"},
+        {"tables": ["t1"]},
+        {"revision": "head~1", "soft": True},
+    ],
+)
+def test_reset(doltdb, kwargs):
     db = Dolt(doltdb)
-    db.reset()
-    db.reset(hard=True)
-    db.reset(soft=True)
-    db.reset(tables="t1")
-    db.reset(tables=["t1"])
-    db.reset(revision="head~1", soft=True)
-    with pytest.raises(ValueError):
-        db.reset(tables=["t1"], revision="head~1")
+    db.reset(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"hard": True, "soft": True},
+        {"tables": "t1", "hard": True},
+        {"tables": "t1", "soft": True},
+        {"tables": {"t1": True}},
+        {"tables": ["t1"], "revision": "head~1"},
+    ],
+)
+def test_reset_errors(shared_doltdb, kwargs, monkeypatch):
+    db = Dolt(shared_doltdb)
 
+    # the arguments are rejected before dolt is run
+    def execute(*args, **kwargs):
+        raise AssertionError("dolt should not be run")
 
-def test_reset_errors(doltdb):
-    db = Dolt(doltdb)
-    with pytest.raises(ValueError):
-        db.reset(hard=True, soft=True)
+    monkeypatch.setattr(dolt_module, "_execute", execute)
     with pytest.raises(ValueError):
-        db.reset(tables="t1", hard=True)
-    with pytest.raises(ValueError):
-        db.reset(tables="t1", soft=True)
-    with pytest.raises(ValueError):
-        db.reset(tables={"t1": True})
+        db.reset(**kwargs)
 
 
 def test_repo_name_trailing_slash(tmp_path):
     repo_path, repo_data_dir = get_repo_path_tmp_path(tmp_path)
     assert Dolt.init(str(repo_path) + "/").repo_name == "test_repo_name_trailing_slash0"
     shutil.rmtree(repo_data_dir)
+
+
+def test_head_cached(stub_repo, monkeypatch):
+    repo = stub_repo
+    queries = []
+
+    def sql(query, result_format=None):
+        queries.append(query)
+        assert result_format == "json"
+        return {"rows": [{"hash": f"hash{len(queries)}"}]}
+
+    monkeypatch.setattr(repo, "sql", sql)
+    monkeypatch.setattr(repo, "_run", lambda args, outfile=None, capture=True: "")
+    assert repo.head == repo.head == "hash1"
+    repo.execute(["status"])
+    assert repo.head == "hash1"
+    repo.execute(["commit", "-m", "test"])
+    assert repo.head == "hash2"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy imports need Python 3.7")
+def test_lazy_imports():
+    code = "import sys, doltcli; doltcli.read_rows_sql; assert 'doltcli.dolt' not in sys.modules; doltcli.Dolt"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_repo_name(tmp_path):
+    for name in ("my-repo", "other"):
+        os.makedirs(os.path.join(tmp_path, name, ".dolt"))
+    repo = Dolt(os.path.join(tmp_path, "my-repo"))
+    assert repo.repo_name == repo.repo_name == "my_repo"
+    repo.repo_dir = os.path.join(tmp_path, "other")
+    assert repo.repo_name == "other"
+
+
+def test_parse_dolt_log_table():
+    def row(ref, parent):
+        return {
+            "commit_hash": ref,
+            "parent_hash": parent,
+            "committer": "a",
+            "email": "a@b.c",
+            "date": "2021-01-01",
+            "message": ref,
+        }
+
+    commits = Commit.parse_dolt_log_table(
+        [row("m", "a"), row("m", "b"), row("a", "b"), row("b", "")]
+    )
+    assert list(commits) == ["m", "a", "b"]
+    assert commits["m"].merge and commits["m"].parents == ["a", "b"]
+    assert not commits["a"].merge and commits["a"].parents == "b"
+    table = CommitTable([row("m", "a"), row("m", "b"), row("a", "b"), row("b", "")])
+    assert table.refs == ["m", "a", "b"] and table.parents[0] == ["a", "b"]
+    assert dict(table) == dict(commits)
+
+
+def test_status_parsing(stub_repo, monkeypatch):
+    repo = stub_repo
+    output = """On branch main
+Changes to be committed:
+  (use "dolt reset <table>..." to unstage)
+	new table:      t1
+	modified:       t2
+Changes not staged for commit:
+	modified:       t3
+Untracked files:
+	new table:      t4
+"""
+    monkeypatch.setattr(
+        dolt_module, "_execute_lines", lambda args, cwd: iter(output.splitlines(True))
+    )
+    status = repo.status()
+    assert not status.is_clean
+    assert status.modified_tables == {"t2": True, "t3": False}
+    assert status.added_tables == {"t1": True, "t4": False}
+    output = "On branch main\nnothing to commit, working tree clean\n"
+    assert repo.status().is_clean
+
+
+def test_ls_cached(stub_repo, monkeypatch):
+    repo = stub_repo
+    calls = []
+
+    def execute_lines(args, cwd):
+        calls.append(args)
+        return iter(["Tables in working set:\n", "\t t1    abc    2 rows\n"])
+
+    monkeypatch.setattr(dolt_module, "_execute_lines", execute_lines)
+    monkeypatch.setattr(repo, "_run", lambda args, outfile=None, capture=True: "")
+    assert [t.name for t in repo.ls()] == [t.name for t in repo.ls()] == ["t1"]
+    assert len(calls) == 1
+    repo.ls(force_refresh=True)
+    assert len(calls) == 2
+    repo.execute(["table", "rm", "t1"])
+    repo.ls()
+    assert len(calls) == 3
+
+
+def test_get_log_table_query():
+    query = Commit.get_log_table_query(number=3, commit="a'b")
+    assert "WHERE dc.`commit_hash`='a''b'" in query and query.endswith("LIMIT 3")
+    with pytest.raises(ValueError):
+        Commit.get_log_table_query(number="1; drop table t")
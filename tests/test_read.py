@@ -9,6 +9,7 @@ from doltcli import (
     columns_to_rows,
     read_columns,
     read_rows,
+    read_tuples_sql,
     write_rows,
 )
 from tests.helpers import compare_rows_helper
@@ -59,3 +60,11 @@ def test_read_columns(with_initial_test_data):
     second_write = columns_to_rows(read_columns(dolt, TEST_TABLE, second_commit))
     sorted(second_write, key=lambda x: int(x["id"]))
     compare_rows_helper(second_write, TEST_DATA_COMBINED)
+    with pytest.raises(KeyError):
+        first_write["missing"]
+
+
+def test_read_tuples_sql(with_initial_test_data):
+    dolt, _ = with_initial_test_data
+    rows = read_tuples_sql(dolt, f"select id, name from {TEST_TABLE} order by id")
+    assert rows == [(row["id"], row["name"]) for row in TEST_DATA_INITIAL]
@@ -1,6 +1,11 @@
 import datetime
+from dataclasses import dataclass
+from typing import List
 
-from doltcli import Branch
+import pytest
+
+from doltcli import Branch, Commit, Remote
+from doltcli.types import BaseDataclass, RawJSON
 
 dt = datetime.datetime.strptime("2018-06-29", "%Y-%m-%d")
 
@@ -24,3 +29,31 @@ def test_datetime_serialize():
             {"name": "test", "hash": "23", "latest_committer": null, "latest_committer_email": null, "latest_commit_date": "2018-06-29 00:00:00", "latest_commit_message": null, "remote": null, "branch": null}
             """.strip()
     )
+
+
+def test_json_unserializable():
+    commit = Commit("ref", dt, "author", "email", "message", parents=object())
+    with pytest.raises(TypeError):
+        commit.json()
+
+
+@dataclass
+class Remotes(BaseDataclass):
+    remotes: List[Remote]
+
+
+def test_dict_nested():
+    remotes = Remotes([Remote("origin", "url")])
+    d = remotes.dict()
+    assert d == {"remotes": [{"name": "origin", "url": "url"}]}
+    d["remotes"].clear()
+    assert len(remotes.remotes) == 1
+
+
+def test_json_raw_passthrough():
+    commit = Commit("ref", dt, "author", "email", "message", parents=RawJSON('["a", "b"]'))
+    assert commit.dict()["parents"] == ["a", "b"]
+    assert (
+        commit.json()
+        == Commit("ref", dt, "author", "email", "message", parents=["a", "b"]).json()
+    )
@@ -2,13 +2,16 @@ import os
 
 import pytest
 
+import doltcli.dolt as dolt_module
 from doltcli import (
     CREATE,
     DoltException,
+    bulk_write,
     read_rows,
     write_columns,
     write_file,
     write_rows,
+    write_rows_stream,
 )
 from tests.helpers import compare_rows_helper, write_dict_to_csv
 
@@ -35,6 +38,26 @@ def test_write_rows(init_empty_test_repo):
     compare_rows_helper(TEST_ROWS, actual)
 
 
+def test_write_rows_stream(init_empty_test_repo):
+    dolt = init_empty_test_repo
+    write_rows_stream(dolt, "characters", (dict(row) for row in TEST_ROWS), CREATE, ["id"])
+    actual = read_rows(dolt, "characters")
+    compare_rows_helper(TEST_ROWS, actual)
+
+
+def test_bulk_write(init_empty_test_repo):
+    dolt = init_empty_test_repo
+    bulk_write(
+        dolt,
+        [("characters", TEST_ROWS), ("others", TEST_ROWS)],
+        primary_key=["id"],
+        commit=True,
+    )
+    for table in ["characters", "others"]:
+        compare_rows_helper(TEST_ROWS, read_rows(dolt, table))
+    assert dolt.status().is_clean
+
+
 def test_update_rows(init_empty_test_repo):
     dolt = init_empty_test_repo
     write_rows(dolt, "characters", TEST_ROWS, CREATE, ["id"])
@@ -95,22 +118,23 @@ def test_write_file_handle(init_empty_test_repo, tmp_path):
     ]
     write_dict_to_csv(TEST_ROWS, tempfile)
     dolt = init_empty_test_repo
-    with pytest.raises(DoltException):
+    with open(tempfile) as fh, pytest.raises(DoltException):
         write_file(
             dolt=dolt,
             table="characters",
-            file_handle=open(tempfile),
+            file_handle=fh,
             import_mode=CREATE,
             primary_key=["id"],
         )
-    write_file(
-        dolt=dolt,
-        table="characters",
-        file_handle=open(tempfile),
-        import_mode=CREATE,
-        primary_key=["id"],
-        do_continue=True,
-    )
+    with open(tempfile) as fh:
+        write_file(
+            dolt=dolt,
+            table="characters",
+            file_handle=fh,
+            import_mode=CREATE,
+            primary_key=["id"],
+            do_continue=True,
+        )
     actual = read_rows(dolt, "characters")
     compare_rows_helper(TEST_ROWS[:2], actual)
 
@@ -137,7 +161,7 @@ def test_write_file(init_empty_test_repo, tmp_path):
     compare_rows_helper(TEST_ROWS[:2], actual)
 
 
-def test_write_file_errors(init_empty_test_repo, tmp_path):
+def test_write_file_errors(init_empty_test_repo, tmp_path, monkeypatch):
     tempfile = tmp_path / "test.csv"
     TEST_ROWS = [
         {"name": "Anna", "adjective": "tragic", "id": "1", "date_of_death": "1877-01-01"},
@@ -146,19 +170,25 @@ def test_write_file_errors(init_empty_test_repo, tmp_path):
     ]
     write_dict_to_csv(TEST_ROWS, tempfile)
     dolt = init_empty_test_repo
-    with pytest.raises(DoltException):
+    with open(tempfile) as fh, pytest.raises(DoltException):
         write_file(
             dolt=dolt,
             table="characters",
-            file_handle=open(tempfile),
+            file_handle=fh,
             import_mode=CREATE,
             primary_key=["id"],
         )
-    with pytest.raises(ValueError):
+
+    # the arguments below are rejected before dolt is run
+    def execute(*args, **kwargs):
+        raise AssertionError("dolt should not be run")
+
+    monkeypatch.setattr(dolt_module, "_execute", execute)
+    with open(tempfile) as fh, pytest.raises(ValueError):
         write_file(
             dolt=dolt,
             table="characters",
-            file_handle=open(tempfile),
+            file_handle=fh,
             file=tempfile,
             import_mode=CREATE,
             primary_key=["id"],